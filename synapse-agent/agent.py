@@ -4,7 +4,7 @@ Constructs and configures the tool-calling agent and its executor.
 """
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.agents import AgentExecutor, create_tool_calling_agent
-from config import LLM_GEMINI
+import config
 from tools import ALL_TOOLS
 
 def create_research_agent() -> AgentExecutor:
@@ -36,7 +36,7 @@ def create_research_agent() -> AgentExecutor:
     )
 
     # Create the agent
-    agent = create_tool_calling_agent(llm=LLM_GEMINI, tools=ALL_TOOLS, prompt=prompt)
+    agent = create_tool_calling_agent(llm=config.LLM_GEMINI, tools=ALL_TOOLS, prompt=prompt)
 
     # Create the agent executor
     return AgentExecutor(
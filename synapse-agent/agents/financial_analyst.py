@@ -1,7 +1,10 @@
 # agents/financial_analyst.py
 from langchain_core.prompts import ChatPromptTemplate
-from config import LLM_GEMINI
-from tools import VECTOR_SEARCH_TOOL, STOCK_PRICE_TOOL
+import config
+import telemetry
+from llm_cache import fingerprint, llm_params, normalize_prompt
+from prompt_context import assemble_context, estimate_tokens, fit_blocks
+from tools.vector_search import retrieve_documents
 
 def create_financial_analyst(state):
     """
@@ -13,18 +16,26 @@ def create_financial_analyst(state):
     # STEP 1: Explicitly call the tools to gather context.
     # -----------------------------------------------------
     
-    # Retrieve news context from the vector database
+    # Stock data was fetched by the MarketDataSpecialist branch, if the plan had tickers.
+    # It is kept whole per ticker and may use at most half of the token budget.
+    stock_context = fit_blocks(state.get('stock_context', ""), config.CONTEXT_TOKEN_BUDGET // 2)
+
+    # Retrieve news context from the vector database and fit it into the rest of the budget.
     print("Gathering news context from vector database...")
-    context = VECTOR_SEARCH_TOOL.invoke({"query": state['original_query']})
-    
-    # Retrieve stock price context if tickers are present
-    stock_context = ""
-    tickers = state.get('research_plan', {}).get('stock_tickers', [])
-    if tickers:
-        print(f"Gathering stock data for tickers: {tickers}")
-        for ticker in tickers:
-            stock_context += f"\n\n{STOCK_PRICE_TOOL.invoke({'ticker': ticker})}"
-            
+    docs = retrieve_documents(state['original_query'], k=config.CONTEXT_CANDIDATE_DOCS)
+    assembled = assemble_context(
+        docs,
+        budget_tokens=config.CONTEXT_TOKEN_BUDGET - estimate_tokens(stock_context),
+        max_snippet_tokens=config.CONTEXT_MAX_SNIPPET_TOKENS,
+        recency_weight=config.CONTEXT_RECENCY_WEIGHT,
+        half_life_days=config.CONTEXT_RECENCY_HALF_LIFE_DAYS,
+    )
+    context = assembled.text or "No relevant documents were found in the local vector store."
+    retrieved_sources = [
+        {"source": d.metadata.get("source"), "date": d.metadata.get("date"), "url": d.metadata.get("url")}
+        for d in assembled.documents
+    ]
+
     # STEP 2: Synthesize the report using the gathered context.
     # ---------------------------------------------------------
     
@@ -46,13 +57,42 @@ def create_financial_analyst(state):
         """
     )
 
-    chain = report_prompt | LLM_GEMINI
-    
-    report = chain.invoke({
+    inputs = {
         "original_query": state['original_query'],
         "context": context,
-        "stock_context": stock_context if stock_context else "No stock data requested."
-    })
-    
-    state['final_report'] = report.content
-    return state
+        "stock_context": stock_context or ("Stock data was omitted for length." if state.get('stock_context')
+                                           else "No stock data requested.")
+    }
+    # Recorded with every run so prompt size (and the savings from the budget) can be tracked.
+    prompt_tokens = estimate_tokens(report_prompt.format(**inputs))
+    context_stats = {**assembled.stats, "prompt_tokens": prompt_tokens}
+    print(f"Context: {assembled.stats['used']} of {len(docs)} snippets, prompt ≈ {prompt_tokens} tokens")
+    result = {"retrieved_sources": retrieved_sources, "prompt_tokens": prompt_tokens, "context_stats": context_stats}
+
+    # Reports are keyed by a fingerprint of the context too, so a cached report
+    # is only reused while the retrieved news and market data are unchanged.
+    if config.LLM_CACHE_ENABLED:
+        params = fingerprint(llm_params(config.LLM_GEMINI), report_prompt.messages[0].prompt.template)
+        key = fingerprint(params, normalize_prompt(state['original_query']),
+                          fingerprint(inputs["context"], inputs["stock_context"]))
+        cached = config.LLM_CACHE.get("report", key)
+        config.LLM_CACHE.record("report", "exact" if cached is not None else "miss")
+        if cached is not None:
+            print("Report served from cache (same query and context).")
+            return {"final_report": cached, **result}
+
+    # When the graph is run with stream_mode="messages", the model call below
+    # is streamed token by token to the caller through the graph's callbacks.
+    chain = report_prompt | config.LLM_GEMINI
+
+    with telemetry.span("llm", "report") as span:
+        report = chain.invoke(inputs)
+        if telemetry.enabled():
+            # Gemini reports usage; fall back to local estimates when it is missing.
+            usage = getattr(report, "usage_metadata", None) or {}
+            span.set(prompt_tokens=usage.get("input_tokens", prompt_tokens),
+                     completion_tokens=usage.get("output_tokens") or estimate_tokens(str(report.content)))
+
+    if config.LLM_CACHE_ENABLED:
+        config.LLM_CACHE.put("report", key, params, report.content, ttl=config.LLM_CACHE_REPORT_TTL)
+    return {"final_report": report.content, **result}
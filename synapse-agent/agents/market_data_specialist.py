@@ -0,0 +1,14 @@
+# agents/market_data_specialist.py
+from tools.stock_tool import get_stock_prices
+
+def create_market_data_specialist(state):
+    """
+    The market data agent that fetches stock data for the plan's tickers.
+    It runs alongside the SearchSpecialist, since neither depends on the other.
+    """
+    print("---MARKET DATA SPECIALIST: FETCHING STOCK DATA---")
+    tickers = state['research_plan'].get('stock_tickers', [])
+    print(f"Gathering stock data for tickers: {tickers}")
+
+    # All tickers go out in one batched, cached request.
+    return {"stock_context": get_stock_prices(tickers)}
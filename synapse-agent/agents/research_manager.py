@@ -1,7 +1,12 @@
 # agents/research_manager.py
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
-from config import LLM_GEMINI
+import json
+import config
+import telemetry
+from llm_cache import fingerprint, llm_params, normalize_prompt
+from prompt_context import estimate_tokens
+from tools.symbols import query_entities, simple_plan, unresolved_names, validate_tickers
 from typing import TypedDict, Dict, List
 
 class ResearchPlan(BaseModel):
@@ -11,8 +16,49 @@ class ResearchPlan(BaseModel):
     search_queries: List[str] = Field(description="A list of 3-5 concise search queries for the web.")
     stock_tickers: List[str] = Field(description="A list of any stock ticker symbols mentioned in the query.")
 
+def _cached_plan(query: str, key: str, scope: str):
+    """
+    Looks up a plan by exact key, then by query embedding among plans with
+    the same `scope`. Returns (plan or None, query embedding or None).
+    """
+    cache = config.LLM_CACHE
+    cached = cache.get("plan", key)
+    if cached is not None:
+        cache.record("plan", "exact")
+        print("Research plan served from cache (exact match).")
+        return json.loads(cached), None
+
+    embedding = None
+    if config.LLM_CACHE_SEMANTIC:
+        embedding = config.EMBED_MODEL.embed_query(normalize_prompt(query))
+        cached = cache.get_similar("plan", scope, embedding, config.LLM_CACHE_PLAN_MAX_DISTANCE)
+        if cached is not None:
+            cache.record("plan", "semantic")
+            print("Research plan served from cache (similar query).")
+            return json.loads(cached), embedding
+
+    cache.record("plan", "miss")
+    return None, embedding
+
+def _checked(research_plan: Dict, query: str) -> Dict:
+    """
+    Replaces the plan's tickers with validated ones, so bad symbols never
+    reach market data. Unlisted tickers are kept only if the query could name them.
+    """
+    tickers, rejected = validate_tickers(research_plan.get("stock_tickers", []), query=query)
+    if rejected:
+        print(f"Dropped unrecognized tickers from the plan: {rejected}")
+    return {**research_plan, "stock_tickers": tickers}
+
 def create_research_manager(state):
     """Creates a structured research plan."""
+    # Questions that only name companies or tickers get a deterministic plan.
+    if config.SYMBOLS_FAST_PATH:
+        research_plan = simple_plan(state['original_query'])
+        if research_plan is not None:
+            print(f"Research plan built locally for {research_plan['stock_tickers']} (no LLM call).")
+            return {"research_plan": _checked(research_plan, state['original_query'])}
+
     prompt = ChatPromptTemplate.from_messages([
         ("system",
          "You are the Research Manager. Your role is to analyze a user's query and create a structured research plan. "
@@ -22,11 +68,32 @@ def create_research_manager(state):
         ("user", "{original_query}")
     ])
     
+    if config.LLM_CACHE_ENABLED:
+        params = fingerprint(llm_params(config.LLM_GEMINI), prompt.messages[0].prompt.template,
+                             ResearchPlan.model_json_schema())
+        key = fingerprint(params, normalize_prompt(state['original_query']))
+        # Similar questions only share a plan when they name the same companies,
+        # so "outlook for AAPL" never gets the plan made for "outlook for MSFT".
+        # Names the symbol table does not know ('Roku', 'Etsy') count as well.
+        scope = fingerprint(params, query_entities(state['original_query']),
+                            unresolved_names(state['original_query']))
+        cached_plan, embedding = _cached_plan(state['original_query'], key, scope)
+        if cached_plan is not None:
+            return {"research_plan": _checked(cached_plan, state['original_query'])}
+
     # Use the structured_output feature to force a JSON-like response
-    structured_llm = LLM_GEMINI.with_structured_output(ResearchPlan)
+    structured_llm = config.LLM_GEMINI.with_structured_output(ResearchPlan)
     chain = prompt | structured_llm
     
-    plan = chain.invoke(state)
-    
-    state['research_plan'] = plan.model_dump() # Store the plan as a dictionary
-    return state
+    with telemetry.span("llm", "plan") as span:
+        plan = chain.invoke(state)
+        research_plan = plan.model_dump() # Store the plan as a dictionary
+        # Structured output does not expose usage metadata, so both sides are estimated.
+        if telemetry.enabled():
+            span.set(prompt_tokens=estimate_tokens(prompt.format(original_query=state['original_query'])),
+                     completion_tokens=estimate_tokens(json.dumps(research_plan)))
+
+    if config.LLM_CACHE_ENABLED:
+        config.LLM_CACHE.put("plan", key, scope, json.dumps(research_plan),
+                             ttl=config.LLM_CACHE_PLAN_TTL, embedding=embedding)
+    return {"research_plan": _checked(research_plan, state['original_query'])}
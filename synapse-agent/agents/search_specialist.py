@@ -1,28 +1,166 @@
 # agents/search_specialist.py
-from tools import TAVILY_TOOL
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import config
+import telemetry
+from config import SEARCH_CALL_TIMEOUT, SEARCH_NODE_DEADLINE, SEARCH_SOURCE_CONCURRENCY
+from tools.tavily import ingest_tavily_results
+from tools.gdelt import ingest_gdelt_articles
+from tools.common import IngestResult
+from tools.transport import TRANSPORT
+from tools.vector_search import local_coverage
+
+# How often to re-check calls that are still queued behind the concurrency limit.
+_POLL_INTERVAL = 0.1
+
+def run_search_fanout(queries, sources, node_deadline=None):
+    """
+    Sends every query to every source concurrently and collects the results.
+
+    Each source gets its own bounded thread pool, so the per-source concurrency
+    limit holds no matter how many queries are planned. Calls that run longer
+    than SEARCH_CALL_TIMEOUT are reported as timed out, and once the node
+    deadline passes the partial results gathered so far are returned.
+
+    Args:
+        queries: The search queries to run.
+        sources: Maps a source name to a callable taking a query.
+        node_deadline: Overall budget in seconds (defaults to SEARCH_NODE_DEADLINE).
+
+    Returns:
+        list: (source, query, result) tuples in plan order, where result is
+        the callable's return value or an error message string.
+    """
+    node_deadline = time.monotonic() + (SEARCH_NODE_DEADLINE if node_deadline is None else node_deadline)
+    executors = {
+        name: ThreadPoolExecutor(max_workers=max(1, SEARCH_SOURCE_CONCURRENCY.get(name, 1)),
+                                 thread_name_prefix=f"search-{name}")
+        for name in sources
+    }
+    started = {}
+
+    def run(key, search, query):
+        started[key] = time.monotonic()
+        with telemetry.span("tool", key[0], query=query) as span:
+            result = search(query)
+            if isinstance(result, IngestResult):
+                span.set(documents=result.found, stored=result.stored)
+            return result
+
+    futures = {}
+    for name, search in sources.items():
+        for query in queries:
+            key = (name, query)
+            # Each call runs in a copy of this context so its span nests under the node's.
+            futures[executors[name].submit(contextvars.copy_context().run, run, key, search, query)] = key
+
+    results = {}
+    pending = set(futures)
+    try:
+        while pending:
+            now = time.monotonic()
+            # Worker threads cannot be killed, so a timed-out call keeps running
+            # in the background; we just stop waiting for it.
+            for future in list(pending):
+                start = started.get(futures[future])
+                if start is not None and now - start >= SEARCH_CALL_TIMEOUT:
+                    pending.discard(future)
+                    results[futures[future]] = f"Timed out after {SEARCH_CALL_TIMEOUT:g}s."
+            if not pending or now >= node_deadline:
+                break
+
+            wake_at = [node_deadline]
+            wake_at += [started[futures[f]] + SEARCH_CALL_TIMEOUT for f in pending if futures[f] in started]
+            if any(futures[f] not in started for f in pending):
+                wake_at.append(now + _POLL_INTERVAL)
+            done, pending = wait(pending, timeout=max(0.0, min(wake_at) - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    results[futures[future]] = f"Failed: {e}"
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    for future in pending:
+        results[futures[future]] = "Skipped: the search stage deadline was reached."
+
+    return [(name, query, results[(name, query)]) for query in queries for name in sources]
+
+def search_sources() -> dict:
+    """
+    The enabled search-and-ingest callables, by source name. Sources whose
+    circuit breaker is open, or whose recent latency is above
+    SEARCH_SLOW_SOURCE_SECONDS, are left out until their cooldown passes.
+    """
+    sources = {"tavily": ingest_tavily_results}
+    if config.SEARCH_USE_GDELT:
+        sources["gdelt"] = ingest_gdelt_articles
+    skipped = [name for name in sources if not TRANSPORT.available(name, config.SEARCH_SLOW_SOURCE_SECONDS)]
+    if skipped:
+        stats = TRANSPORT.stats()
+        print(f"Skipping unhealthy sources: {', '.join(f'{name} ({stats.get(name)})' for name in skipped)}")
+    return {name: search for name, search in sources.items() if name not in skipped}
+
+def coverage_decision(query: str) -> dict:
+    """
+    Checks whether the local store already covers `query` well enough to
+    skip the network, and returns the decision with the evidence behind it.
+    """
+    coverage = local_coverage(query, config.SEARCH_COVERAGE_MIN_SIMILARITY,
+                              k=max(10, config.SEARCH_COVERAGE_MIN_DOCS))
+    fresh = coverage["newest"] is not None and time.time() - coverage["newest"] <= config.SEARCH_COVERAGE_MAX_STALENESS
+    covered = (
+        fresh
+        and coverage["relevant_docs"] >= config.SEARCH_COVERAGE_MIN_DOCS
+        and len(coverage["sources"]) >= config.SEARCH_COVERAGE_MIN_SOURCES
+    )
+    return {"query": query, "action": "skipped" if covered else "searched", **coverage}
 
 def create_search_specialist(state):
     """
     The search agent that executes the research plan.
-    This agent is now a simple, direct tool call.
+    Every planned query is sent to every enabled source concurrently.
     """
     print("---SEARCH SPECIALIST: EXECUTING SEARCH---")
     queries = state['research_plan'].get('search_queries', [])
-    
-    # We'll just use the first query from the plan for simplicity and speed.
+
     if not queries:
         return {"search_summary": "No search queries were provided in the plan."}
 
-    query = queries[0]
-    print(f"Searching with query: {query}")
+    # Queries the local store already answers with fresh documents skip the network.
+    decisions = []
+    if config.SEARCH_COVERAGE_ENABLED:
+        decisions = [coverage_decision(query) for query in queries]
+        skipped = [d["query"] for d in decisions if d["action"] == "skipped"]
+        if skipped:
+            print(f"Serving {len(skipped)} queries from the local store: {skipped}")
+        queries = [d["query"] for d in decisions if d["action"] == "searched"]
 
-    # Call the tavily tool directly
-    try:
-        result = TAVILY_TOOL.invoke({"query": query})
-        state['search_summary'] = result
-    except Exception as e:
-        print(f"Error during Tavily search: {e}")
-        state['search_summary'] = "Failed to retrieve search results."
-        
-    print(f"Search specialist summary: {state['search_summary']}")
-    return state
+    lines = [f"[local] {d['query']}: {d['relevant_docs']} fresh relevant documents, search skipped"
+             for d in decisions if d["action"] == "skipped"]
+    results = []
+    sources = search_sources() if queries else {}
+    if queries and not sources:
+        lines.append("[search] every source is currently unavailable; using the local store only")
+    elif queries:
+        print(f"Searching {len(queries)} queries across {', '.join(sources)}")
+
+        start = time.monotonic()
+        results = run_search_fanout(queries, sources)
+        print(f"Search stage finished in {time.monotonic() - start:.1f}s")
+
+    ingested = 0
+    for name, query, result in results:
+        if isinstance(result, IngestResult):
+            ingested += result.stored
+            result = f"{result.found} results ({result.stored} new)"
+        lines.append(f"[{name}] {query}: {result}")
+
+    search_summary = "\n".join(lines)
+    print(f"Search specialist summary:\n{search_summary}")
+    # Return only the keys this node owns; it runs in parallel with the market data branch.
+    return {"search_summary": search_summary, "ingested_documents": ingested, "search_decisions": decisions}
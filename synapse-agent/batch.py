@@ -0,0 +1,211 @@
+# batch.py
+"""
+Batch research mode: runs many queries from a JSONL file in one pass.
+
+Plans are generated concurrently, then every search query and ticker across
+the whole batch is de-duplicated so each unique search and quote runs once.
+Reports are written in parallel from the shared vector store and quotes, and
+each finished record is appended to the output JSONL straight away, so an
+interrupted batch resumes where it stopped.
+
+    python batch.py questions.jsonl reports.jsonl
+
+Input lines look like {"id": "q1", "query": "..."}; the id is optional and
+defaults to the line number.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Set
+from dotenv import load_dotenv
+import config
+from agents.financial_analyst import create_financial_analyst
+from agents.research_manager import create_research_manager
+from agents.search_specialist import coverage_decision, run_search_fanout, search_sources
+from tools.common import IngestResult
+from tools.market_data import MARKET_DATA
+from tools.stock_tool import format_quote
+
+def read_queries(path: str) -> List[Dict]:
+    """Reads {"id", "query"} records, giving records without an id their line number."""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not record.get("query", "").strip():
+                print(f"Skipping line {line_no}: no query.")
+                continue
+            records.append({"id": str(record.get("id", line_no)), "query": record["query"]})
+    return records
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids that already have a successful record in the output file."""
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a partial line from an interrupted write
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+def _unique(values) -> List[str]:
+    """De-duplicates case- and whitespace-insensitively, keeping the first spelling."""
+    seen = {}
+    for value in values:
+        seen.setdefault(" ".join(value.split()).lower(), value.strip())
+    return list(seen.values())
+
+def plan_all(records: List[Dict]) -> Dict[str, Dict]:
+    """Generates research plans for every record concurrently. Returns {id: plan or error}."""
+    def plan(record):
+        start = time.monotonic()
+        research_plan = create_research_manager({"original_query": record["query"]})["research_plan"]
+        return research_plan, time.monotonic() - start
+
+    plans = {}
+    with ThreadPoolExecutor(max_workers=config.BATCH_WORKERS, thread_name_prefix="batch-plan") as executor:
+        futures = {executor.submit(plan, record): record["id"] for record in records}
+        for future in as_completed(futures):
+            try:
+                research_plan, seconds = future.result()
+                plans[futures[future]] = {"plan": research_plan, "seconds": seconds}
+            except Exception as e:
+                plans[futures[future]] = {"error": f"Planning failed: {e}"}
+    return plans
+
+def search_all(queries: List[str]) -> Dict:
+    """Runs each unique search query once against every enabled source."""
+    decisions = [coverage_decision(query) for query in queries] if config.SEARCH_COVERAGE_ENABLED else []
+    skipped = {d["query"] for d in decisions if d["action"] == "skipped"}
+    to_search = [query for query in queries if query not in skipped]
+
+    results = []
+    sources = search_sources() if to_search else {}
+    if sources:
+        print(f"Searching {len(to_search)} unique queries across {', '.join(sources)}")
+        results = run_search_fanout(to_search, sources, node_deadline=config.BATCH_SEARCH_DEADLINE)
+
+    stored = sum(result.stored for _, _, result in results if isinstance(result, IngestResult))
+    failed = sum(1 for _, _, result in results if not isinstance(result, IngestResult))
+    return {"searched": len(to_search), "served_locally": len(skipped), "stored": stored, "failed_calls": failed}
+
+def run_batch(input_path: str, output_path: str) -> Dict:
+    """Runs every pending query in `input_path`, appending results to `output_path`."""
+    records = read_queries(input_path)
+    done = completed_ids(output_path)
+    pending = [record for record in records if record["id"] not in done]
+    print(f"{len(records)} queries, {len(done & {r['id'] for r in records})} already done, {len(pending)} to run.")
+    if not pending:
+        return {"queries": 0}
+
+    summary = {"queries": len(pending)}
+    start = time.monotonic()
+    plans = plan_all(pending)
+    summary["plan_seconds"] = round(time.monotonic() - start, 3)
+
+    ok_plans = [entry["plan"] for entry in plans.values() if "plan" in entry]
+    all_queries = [q for plan in ok_plans for q in plan.get("search_queries", [])]
+    all_tickers = [t.upper() for plan in ok_plans for t in plan.get("stock_tickers", [])]
+    search_queries = _unique(all_queries)
+    tickers = list(dict.fromkeys(all_tickers))
+    print(f"Plans share work: {len(all_queries)} search queries -> {len(search_queries)} unique, "
+          f"{len(all_tickers)} tickers -> {len(tickers)} unique.")
+
+    stage = time.monotonic()
+    summary["search"] = search_all(search_queries)
+    summary["search_seconds"] = round(time.monotonic() - stage, 3)
+
+    # One batched quote request for the whole batch; each report formats its
+    # own tickers from these quotes rather than looking them up again, since
+    # the report phase can outlast the quote cache's TTL.
+    stage = time.monotonic()
+    quotes, quote_error = {}, None
+    if tickers:
+        try:
+            quotes = MARKET_DATA.get_quotes(tickers)
+        except Exception as e:
+            quote_error = e
+            print(f"Batched quote fetch failed: {e}")
+    summary["quote_seconds"] = round(time.monotonic() - stage, 3)
+
+    def report(record):
+        research_plan = plans[record["id"]]["plan"]
+        report_start = time.monotonic()
+        state = {"original_query": record["query"], "research_plan": research_plan}
+        plan_tickers = [t.upper() for t in research_plan.get("stock_tickers", [])]
+        if plan_tickers and quote_error is not None:
+            state["stock_context"] = (f"An error occurred while fetching stock data for "
+                                      f"{', '.join(plan_tickers)}: {quote_error}")
+        elif plan_tickers:
+            state["stock_context"] = "\n\n".join(format_quote(t, quotes.get(t)) for t in plan_tickers)
+        result = create_financial_analyst(state)
+        return result, time.monotonic() - report_start
+
+    stage = time.monotonic()
+    written = failed = 0
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=config.BATCH_WORKERS, thread_name_prefix="batch-report") as executor:
+        futures = {}
+        for record in pending:
+            entry = plans[record["id"]]
+            if "error" in entry:
+                out.write(json.dumps({**record, "status": "error", "error": entry["error"]}) + "\n")
+                failed += 1
+                continue
+            futures[executor.submit(report, record)] = record
+
+        # Records are written from this thread only, as each report finishes.
+        for future in as_completed(futures):
+            record = futures[future]
+            entry = plans[record["id"]]
+            try:
+                result, seconds = future.result()
+                line = {
+                    **record,
+                    "status": "ok",
+                    "plan": entry["plan"],
+                    "report": result["final_report"],
+                    "sources": result.get("retrieved_sources", []),
+                    "prompt_tokens": result.get("prompt_tokens"),
+                    "timings": {"plan": round(entry["seconds"], 3), "report": round(seconds, 3)},
+                }
+                written += 1
+            except Exception as e:
+                line = {**record, "status": "error", "error": f"Report failed: {e}"}
+                failed += 1
+            out.write(json.dumps(line, default=str, ensure_ascii=False) + "\n")
+            out.flush()
+
+    summary["report_seconds"] = round(time.monotonic() - stage, 3)
+    summary["total_seconds"] = round(time.monotonic() - start, 3)
+    summary.update(written=written, failed=failed)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Run research queries from a JSONL file in one batch.")
+    parser.add_argument("input", help="JSONL file of {\"id\": ..., \"query\": ...} records.")
+    parser.add_argument("output", help="JSONL file to append reports to; completed ids are skipped on rerun.")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if not os.getenv("GOOGLE_API_KEY") or not os.getenv("TAVILY_API_KEY"):
+        print("ERROR: Please set GOOGLE_API_KEY and TAVILY_API_KEY in your .env file.")
+        return
+
+    config.warm_up()
+    summary = run_batch(args.input, args.output)
+    print(f"Batch finished: {json.dumps(summary)}")
+    if config.LLM_CACHE_ENABLED:
+        print(f"LLM response cache: {config.LLM_CACHE.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/article_fetch.py
+"""
+Measures article ingestion throughput against a local HTTP stand-in.
+
+A threaded local server serves synthetic article pages with a configurable
+delay, so fetch, extraction and chunking can be measured without touching
+the network. By default chunks go to a counting sink; pass --store to
+embed and write them into the real vector store as well.
+
+    python benchmarks/article_fetch.py --articles 500 --delay 0.2
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PARAGRAPH = ("Markets moved on the latest guidance as analysts weighed margins, demand and supply "
+             "constraints across the sector, with several desks revising their estimates. ")
+
+def make_handler(delay: float, paragraphs: int):
+    page = (
+        "<html><head><title>Synthetic</title><script>var x = 1;</script></head><body>"
+        "<nav>Home | Markets | Tech</nav><article>"
+        + "".join(f"<p>{PARAGRAPH * 3}({i})</p>" for i in range(paragraphs))
+        + "</article><footer>Copyright</footer></body></html>"
+    ).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(page)))
+            self.end_headers()
+            self.wfile.write(page)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--hosts", type=int, default=8, help="Distinct host names to spread articles over.")
+    parser.add_argument("--delay", type=float, default=0.1, help="Server-side latency per page, in seconds.")
+    parser.add_argument("--paragraphs", type=int, default=12)
+    parser.add_argument("--store", action="store_true", help="Embed and store chunks in the vector store.")
+    args = parser.parse_args()
+
+    from tools.articles import ingest_articles
+    from tools.common import upsert_documents
+
+    # One server per simulated host; each port counts as a separate host for per-host limits.
+    handler = make_handler(args.delay, args.paragraphs)
+    servers = [ThreadingHTTPServer(("127.0.0.1", 0), handler) for _ in range(args.hosts)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    ports = [server.server_address[1] for server in servers]
+
+    refs = [
+        (f"http://127.0.0.1:{ports[i % len(ports)]}/article/{i}", f"Article {i}", "20250101T000000Z", "bench")
+        for i in range(args.articles)
+    ]
+    sink = upsert_documents if args.store else len
+
+    result = ingest_articles(refs, sink=sink)
+    for server in servers:
+        server.shutdown()
+
+    print(f"articles:  {result.articles} ({result.fetched} fetched)")
+    print(f"chunks:    {result.chunks}")
+    print(f"elapsed:   {result.seconds:.2f}s")
+    print(f"throughput: {result.articles_per_second:.1f} articles/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/embeddings.py
+"""
+Compares embedding backends on throughput, query latency and retrieval agreement.
+
+Each configuration (PyTorch, the int8 ONNX export in-process, and the ONNX
+export with the multi-process encoder pool) embeds the same synthetic news
+corpus and reports documents per second, then encodes the benchmark
+queries one at a time for query latency. Quality is measured against the
+PyTorch backend: the mean cosine similarity of each document's two vectors,
+and the overlap of each query's top-k neighbours (recall@k with PyTorch's
+neighbours as the reference), so the PyTorch backend must load. The
+embedding cache is bypassed throughout.
+
+    python benchmarks/embeddings.py --docs 5000 --workers 4
+    python benchmarks/embeddings.py --model ./local-model --onnx-file onnx/model_quint8_avx2.onnx
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run(name, model, docs, queries):
+    """Embeds the corpus and the queries; returns the row and (document, query) vectors."""
+    import numpy as np
+
+    model.embed_documents(docs[:64])  # warm-up (and, for the pool, process start-up)
+    start = time.perf_counter()
+    doc_vectors = np.asarray(model.embed_documents(docs), dtype=np.float32)
+    docs_per_s = len(docs) / (time.perf_counter() - start)
+
+    latencies, query_vectors = [], []
+    for query in queries:
+        t0 = time.perf_counter()
+        query_vectors.append(model.embed_query(query))
+        latencies.append(time.perf_counter() - t0)
+    row = {"backend": name, "docs_per_s": docs_per_s,
+           "query_p50_ms": percentile(latencies, 50) * 1000, "query_p99_ms": percentile(latencies, 99) * 1000}
+    return row, doc_vectors, np.asarray(query_vectors, dtype=np.float32)
+
+def top_k(doc_vectors, query_vectors, k):
+    import numpy as np
+
+    norms = np.linalg.norm(doc_vectors, axis=1) * np.linalg.norm(query_vectors, axis=1)[:, None]
+    scores = query_vectors @ doc_vectors.T / np.maximum(norms, 1e-12)
+    return [set(row) for row in np.argsort(-scores, axis=1)[:, :k].tolist()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=0, help="In-process threads (0 = runtime default).")
+    parser.add_argument("--workers", type=int, default=max(2, (os.cpu_count() or 2) // 2),
+                        help="Encoder pool processes.")
+    parser.add_argument("--model", default=None, help="Model name or local path (default EMBED_MODEL_NAME).")
+    parser.add_argument("--onnx-file", default="onnx/model_qint8_avx2.onnx")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    import numpy as np
+    import config
+    from benchmarks.retrieval import make_corpus, make_queries
+    from embeddings import LocalEmbeddings
+
+    rng = random.Random(args.seed)
+    query_specs = make_queries(args.queries, rng)
+    docs = [text for _, text, _ in make_corpus(args.docs, query_specs, 5, rng)]
+    queries = [spec["question"] for spec in query_specs]
+
+    configs = [
+        ("torch", dict(backend="torch")),
+        ("onnx-int8", dict(backend="onnx", onnx_file=args.onnx_file)),
+        (f"onnx-int8 x{args.workers} procs", dict(backend="onnx", onnx_file=args.onnx_file,
+                                                 pool_workers=args.workers, pool_min_batch=1)),
+    ]
+    print(f"{len(docs)} documents, {len(queries)} queries, batch size {args.batch_size}")
+    print(f"{'backend':<24} {'docs/s':>9} {'query p50':>10} {'query p99':>10} {'cosine':>7} {'recall@' + str(args.k):>9}")
+    reference = None
+    for name, kwargs in configs:
+        try:
+            model = LocalEmbeddings(args.model or config.EMBED_MODEL_NAME, batch_size=args.batch_size,
+                                    threads=args.threads, **kwargs)
+        except ImportError as e:
+            if reference is None:
+                # Without it the quality columns would silently compare against another backend.
+                raise SystemExit(f"The PyTorch backend is the quality reference and could not be loaded: {e}")
+            print(f"{name:<24} skipped: {e}")
+            continue
+        row, doc_vectors, query_vectors = run(name, model, docs, queries)
+        model.close()
+
+        cosine = recall = 1.0
+        if reference is None:
+            reference = (doc_vectors, top_k(doc_vectors, query_vectors, args.k))
+        else:
+            ref_docs, ref_top = reference
+            cosine = float(np.mean(np.sum(ref_docs * doc_vectors, axis=1) /
+                                   (np.linalg.norm(ref_docs, axis=1) * np.linalg.norm(doc_vectors, axis=1))))
+            found = top_k(doc_vectors, query_vectors, args.k)
+            recall = statistics.mean(len(a & b) / args.k for a, b in zip(ref_top, found))
+        print(f"{name:<24} {row['docs_per_s']:>9.0f} {row['query_p50_ms']:>8.2f}ms {row['query_p99_ms']:>8.2f}ms "
+              f"{cosine:>7.4f} {recall:>9.3f}")
+
+if __name__ == "__main__":
+    main()
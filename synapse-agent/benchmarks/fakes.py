@@ -0,0 +1,271 @@
+# benchmarks/fakes.py
+"""
+Deterministic local stand-ins for the external services, with configurable latency.
+
+install_fakes() swaps the shared services in `config` and the network-bound
+search and market-data calls for these fakes, so the real graph, vector
+store and ingestion code can be exercised without API keys. With
+network=True the swap happens one level lower instead: the `tavily` and
+`yfinance` modules are replaced, and GDELT, article pages and RSS feeds are
+served over HTTP by a local FakeNewsServer, so the real tool code
+(requests, feedparser, HTML extraction, chunking) runs as well.
+"""
+import datetime
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import types
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlsplit
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+import config
+
+# The FakeNewsServer started by install_fakes(network=True), if any.
+news_server: Optional["FakeNewsServer"] = None
+
+class FakeChatModel(BaseChatModel):
+    """
+    A chat model that plans from the query text and writes a fixed-length
+    report, sleeping to simulate Gemini's planning latency, time to first
+    token and per-token latency.
+    """
+    model: str = "fake-gemini"
+    temperature: float = 0.0
+    plan_latency: float = 0.0
+    first_token_latency: float = 0.0
+    token_latency: float = 0.0
+    report_tokens: int = 120
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _tokens(self) -> List[str]:
+        return [f"token{i} " for i in range(self.report_tokens)]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.first_token_latency + self.token_latency * self.report_tokens)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(self._tokens())))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_latency)
+        for token in self._tokens():
+            time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema, **kwargs):
+        """Builds a plan of three queries and any upper-case ticker-like words in the query."""
+        def plan(prompt_value):
+            time.sleep(self.plan_latency)
+            query = prompt_value.to_messages()[-1].content
+            tickers = list(dict.fromkeys(re.findall(r"\b[A-Z]{2,5}\b", query)))
+            return schema(
+                search_queries=[query, f"{query} latest news", f"{query} analyst view"],
+                stock_tickers=tickers,
+            )
+        return RunnableLambda(plan)
+
+def fake_search(source: str, latency: float = 0.0, results: int = 7):
+    """
+    Returns a search-and-ingest callable that sleeps for `latency`, then
+    ingests `results` synthetic documents derived from the query through the
+    real upsert_documents path.
+    """
+    from tools.common import IngestResult, upsert_documents
+
+    def search(query: str) -> IngestResult:
+        time.sleep(latency)
+        today = datetime.date.today()
+        items = [
+            (f"{query}: synthetic {source} coverage item {i} with details on guidance, demand and margins.",
+             f"https://{source}.example/{zlib.crc32(query.encode())}/{i}", today, source)
+            for i in range(results)
+        ]
+        return IngestResult(len(items), upsert_documents(items))
+
+    return search
+
+def fake_quotes(latency: float = 0.0):
+    """Returns a stand-in for MarketDataEngine.get_quotes with fixed prices per ticker."""
+    from tools.market_data import Quote
+
+    def get_quotes(tickers):
+        time.sleep(latency)
+        today = datetime.date.today().strftime('%Y-%m-%d')
+        return {
+            ticker.upper(): Quote(ticker.upper(), 100.0 + len(ticker), 99.0, 101.5, 98.5, 1_000_000, today)
+            for ticker in tickers
+        }
+
+    return get_quotes
+
+_PARAGRAPH = ("Markets moved on the latest guidance as analysts weighed margins, demand and supply "
+              "constraints across the sector, with several desks revising their estimates.")
+
+class FakeNewsServer:
+    """
+    A threaded local HTTP server standing in for the GDELT document API
+    (/gdelt), article pages (/article/...) and RSS feeds (/rss/<name>),
+    each response delayed by `latency` seconds.
+    """
+
+    def __init__(self, latency: float = 0.0, articles_per_query: int = 10, paragraphs: int = 6):
+        self.latency = latency
+        self.articles_per_query = articles_per_query
+        self.paragraphs = paragraphs
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                time.sleep(server.latency)
+                status, content_type, body = server.respond(self.path)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        threading.Thread(target=self._httpd.serve_forever, name="fake-news", daemon=True).start()
+
+    def shutdown(self) -> None:
+        self._httpd.shutdown()
+
+    def respond(self, path: str):
+        parts = urlsplit(path)
+        if parts.path == "/gdelt":
+            query = parse_qs(parts.query).get("query", [""])[0]
+            seen = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+            articles = [
+                {"url": f"{self.base_url}/article/{zlib.crc32(query.encode())}/{i}",
+                 "title": f"{query}: GDELT coverage {i}", "seendate": seen}
+                for i in range(self.articles_per_query)
+            ]
+            return 200, "application/json", json.dumps({"articles": articles}).encode("utf-8")
+        if parts.path.startswith("/article/"):
+            key = parts.path[len("/article/"):]
+            paragraphs = "".join(f"<p>Story {key}, part {i}. {_PARAGRAPH}</p>" for i in range(self.paragraphs))
+            page = (f"<html><head><title>{key}</title><script>var x = 1;</script></head><body>"
+                    f"<nav>Home | Markets</nav><article>{paragraphs}</article><footer>Copyright</footer>"
+                    "</body></html>")
+            return 200, "text/html; charset=utf-8", page.encode("utf-8")
+        if parts.path.startswith("/rss/"):
+            name = parts.path[len("/rss/"):]
+            pub = datetime.datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
+            items = "".join(
+                f"<item><title>{name} headline {i}</title><link>{self.base_url}/article/rss-{name}/{i}</link>"
+                f"<guid>{name}-{i}</guid><pubDate>{pub}</pubDate></item>"
+                for i in range(self.articles_per_query)
+            )
+            feed = f'<?xml version="1.0"?><rss version="2.0"><channel><title>{name}</title>{items}</channel></rss>'
+            return 200, "application/rss+xml", feed.encode("utf-8")
+        return 404, "text/plain", b"not found"
+
+class FakeTavilyClient:
+    """Stands in for tavily.TavilyClient: deterministic results derived from the query."""
+    latency = 0.0
+    results = 7
+
+    def __init__(self, api_key: str = ""):
+        self.api_key = api_key
+
+    def search(self, query: str, search_depth: str = "basic", max_results: int = 5, **kwargs) -> Dict:
+        time.sleep(self.latency)
+        count = min(max_results, self.results)
+        return {"results": [
+            {"url": f"https://tavily.example/{zlib.crc32(query.encode())}/{i}", "title": f"{query} ({i})",
+             "content": f"{query}: synthetic tavily result {i} covering guidance, demand and margins."}
+            for i in range(count)
+        ]}
+
+def fake_yfinance(latency: float = 0.0) -> types.ModuleType:
+    """A stand-in `yfinance` module whose download() returns five daily bars per ticker."""
+    module = types.ModuleType("yfinance")
+
+    def download(tickers, period="5d", interval="1d", group_by="ticker", **kwargs):
+        import pandas as pd
+
+        time.sleep(latency)
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        index = pd.bdate_range(end=datetime.date.today(), periods=5)
+        frames = {}
+        for ticker in tickers:
+            base = 50 + zlib.crc32(ticker.encode()) % 400
+            closes = [base + step for step in range(5)]
+            frames[ticker] = pd.DataFrame({
+                "Open": closes, "High": [c + 1.5 for c in closes], "Low": [c - 1.5 for c in closes],
+                "Close": closes, "Adj Close": closes, "Volume": [1_000_000] * 5,
+            }, index=index)
+        return pd.concat(frames, axis=1)
+
+    module.download = download
+    return module
+
+def install_fakes(plan_latency: float = 0.0, first_token_latency: float = 0.0, token_latency: float = 0.0,
+                  report_tokens: int = 120, search_latency: float = 0.0, quote_latency: float = 0.0,
+                  persist_directory: Optional[str] = None, network: bool = False,
+                  http_latency: float = 0.0) -> FakeChatModel:
+    """
+    Replaces Gemini, the embedding model, the vector store location, Tavily,
+    GDELT and yfinance with local fakes. Response caching and the local
+    coverage check are turned off so every query does the full amount of work.
+
+    With `network`, Tavily and yfinance are faked at the module level and
+    GDELT (enabled as a search source) and article pages are served by a
+    FakeNewsServer with `http_latency`; the server is left in
+    `benchmarks.fakes.news_server` for RSS feeds and shutdown.
+    """
+    import agents.search_specialist as search_specialist
+    from tools.market_data import MARKET_DATA
+    from lexical_index import LexicalIndex
+    from vector_store import PartitionedVectorStore
+
+    llm = FakeChatModel(plan_latency=plan_latency, first_token_latency=first_token_latency,
+                        token_latency=token_latency, report_tokens=report_tokens)
+    config.LLM_GEMINI = llm
+    config.EMBED_MODEL = DeterministicFakeEmbedding(size=384)
+    config.VECTOR_DB = PartitionedVectorStore(
+        persist_directory=persist_directory or tempfile.mkdtemp(prefix="synapse-bench-"),
+        embedding=config.EMBED_MODEL,
+    )
+    config.LEXICAL_INDEX = LexicalIndex()
+    config.LLM_CACHE_ENABLED = False
+    config.SEARCH_COVERAGE_ENABLED = False
+
+    if network:
+        global news_server
+        FakeTavilyClient.latency = search_latency
+        sys.modules["tavily"] = types.SimpleNamespace(TavilyClient=FakeTavilyClient)
+        sys.modules["yfinance"] = fake_yfinance(quote_latency)
+        news_server = FakeNewsServer(latency=http_latency)
+        config.GDELT_API_URL = f"{news_server.base_url}/gdelt"
+        config.SEARCH_USE_GDELT = True
+        os.environ.setdefault("TAVILY_API_KEY", "fake-key")
+        return llm
+
+    search_specialist.ingest_tavily_results = fake_search("tavily", search_latency)
+    search_specialist.ingest_gdelt_articles = fake_search("gdelt", search_latency, results=30)
+    MARKET_DATA.get_quotes = fake_quotes(quote_latency)
+    return llm
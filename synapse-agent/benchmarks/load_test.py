@@ -0,0 +1,95 @@
+# benchmarks/load_test.py
+"""
+Load-tests the API server against stubbed LLM, search and market-data backends.
+
+Starts server.app in-process on a local port with benchmarks.fakes installed,
+then fires concurrent streaming requests and reports latency percentiles,
+time to first byte, throughput and rejections.
+
+    python benchmarks/load_test.py --requests 200 --concurrency 32
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUERIES = [
+    "How did NVDA's latest earnings affect its outlook?",
+    "What is the market saying about AAPL and MSFT this week?",
+    "Impact of new semiconductor export controls on TSM",
+    "How are rising rates affecting regional bank stocks?",
+]
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def one_request(session, url, query):
+    """Sends one streaming request; returns (status, time to first byte, total seconds)."""
+    start = time.perf_counter()
+    first_byte = None
+    with session.post(url, json={"query": query, "stream": True}, stream=True, timeout=300) as response:
+        if response.status_code != 200:
+            return response.status_code, None, time.perf_counter() - start
+        for _ in response.iter_lines():
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+    return 200, first_byte, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--plan-latency", type=float, default=0.3)
+    parser.add_argument("--search-latency", type=float, default=0.5)
+    parser.add_argument("--first-token-latency", type=float, default=0.5)
+    parser.add_argument("--token-latency", type=float, default=0.005)
+    args = parser.parse_args()
+
+    import requests
+    import uvicorn
+    from benchmarks.fakes import install_fakes
+
+    install_fakes(plan_latency=args.plan_latency, search_latency=args.search_latency,
+                  first_token_latency=args.first_token_latency, token_latency=args.token_latency)
+    import server
+
+    uv_server = uvicorn.Server(uvicorn.Config(server.app, host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=uv_server.run, daemon=True).start()
+    while not uv_server.started:
+        time.sleep(0.05)
+
+    url = f"http://127.0.0.1:{args.port}/research"
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(
+            lambda i: one_request(session, url, QUERIES[i % len(QUERIES)]), range(args.requests)
+        ))
+    wall = time.perf_counter() - start
+    uv_server.should_exit = True
+
+    ok = [r for r in results if r[0] == 200]
+    latencies = [r[2] for r in ok]
+    ttfb = [r[1] for r in ok if r[1] is not None]
+    rejected = sum(1 for r in results if r[0] == 503)
+    print(f"requests:    {len(results)} ({len(ok)} ok, {rejected} rejected, "
+          f"{len(results) - len(ok) - rejected} failed)")
+    print(f"concurrency: {args.concurrency}")
+    if latencies:
+        print(f"latency:     p50 {percentile(latencies, 50):.3f}s  p99 {percentile(latencies, 99):.3f}s  "
+              f"mean {statistics.mean(latencies):.3f}s")
+    if ttfb:
+        print(f"first byte:  p50 {percentile(ttfb, 50):.3f}s  p99 {percentile(ttfb, 99):.3f}s")
+    print(f"throughput:  {len(ok) / wall:.2f} QPS over {wall:.2f}s")
+
+if __name__ == "__main__":
+    main()
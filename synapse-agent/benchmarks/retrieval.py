@@ -0,0 +1,162 @@
+# benchmarks/retrieval.py
+"""
+Measures retrieval latency and recall on synthetic corpora of increasing size.
+
+Each corpus is filler news text with, for every benchmark query, a handful
+of planted relevant documents that mention a distinctive ticker and topic.
+The BM25 index is measured at every size (build rate, query latency and
+recall@k); with --hybrid, sizes up to --hybrid-max are also loaded into a
+temporary vector store (with the deterministic fake embeddings, so vector
+recall there reflects the fake, not the real model) and retrieve_documents
+is measured in vector and hybrid mode through the path the analyst uses.
+
+    python benchmarks/retrieval.py --sizes 10000 100000 1000000
+    python benchmarks/retrieval.py --sizes 10000 --hybrid
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FILLER = ("markets stocks investors analysts shares trading week quarter revenue growth outlook rates "
+          "inflation central bank policy sector demand supply prices oil energy consumer retail banks "
+          "credit bonds yields dollar currency exports imports factory jobs wages housing earnings "
+          "guidance margins costs forecast economy recession rally selloff volatility index futures").split()
+TOPICS = ["export controls", "data center capex", "buyback program", "antitrust probe", "dividend cut",
+          "supply chain", "merger talks", "product recall", "price target", "credit rating"]
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def make_queries(count: int, rng: random.Random):
+    """Benchmark queries: a made-up ticker plus a topic, in keyword and question form."""
+    queries = []
+    for i in range(count):
+        ticker = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(3)) + f"{i:02d}"
+        topic = rng.choice(TOPICS)
+        queries.append({"ticker": ticker, "topic": topic,
+                        "keyword": f"{ticker} {topic}",
+                        "question": f"What is the latest news on {ticker} and its {topic}?"})
+    return queries
+
+def make_corpus(size: int, queries, relevant_per_query: int, rng: random.Random):
+    """Yields (doc_id, text, relevant query index or None) for a corpus of `size` documents."""
+    planted = {}
+    for q, query in enumerate(queries):
+        for j in range(relevant_per_query):
+            planted[rng.randrange(size)] = (q, j)
+    for i in range(size):
+        words = rng.choices(FILLER, k=30)
+        if i in planted:
+            q, j = planted[i]
+            query = queries[q]
+            # Each planted document is distinct but shares the ticker and topic.
+            words[rng.randrange(30):0] = [query["ticker"], *query["topic"].split(), f"update{j}"]
+            yield f"doc{i}", " ".join(words), q
+        else:
+            yield f"doc{i}", " ".join(words), None
+
+def bench_lexical(size: int, args, rng: random.Random):
+    from lexical_index import LexicalIndex
+
+    queries = make_queries(args.queries, rng)
+    index = LexicalIndex()
+    relevant = {q: set() for q in range(len(queries))}
+    now = int(time.time())
+    start = time.perf_counter()
+    batch = []
+    for doc_id, text, q in make_corpus(size, queries, args.relevant, rng):
+        if q is not None:
+            relevant[q].add(doc_id)
+        batch.append((doc_id, text, now))
+        # Same batch size as article ingestion, so this is the incremental path.
+        if len(batch) >= 64:
+            index.add(batch)
+            batch = []
+    index.add(batch)
+    build_seconds = time.perf_counter() - start
+
+    latencies, recalls = [], []
+    for q, query in enumerate(queries):
+        for text in (query["keyword"], query["question"]):
+            t0 = time.perf_counter()
+            hits = index.search(text, k=args.k, since_ts=now - 86400)
+            latencies.append(time.perf_counter() - t0)
+            if relevant[q]:
+                recalls.append(len({hit.doc_id for hit in hits} & relevant[q]) / len(relevant[q]))
+    return {
+        "size": size,
+        "build_docs_per_s": size / build_seconds,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "recall": statistics.mean(recalls) if recalls else 0.0,
+    }
+
+def bench_hybrid(size: int, args, rng: random.Random):
+    from benchmarks.fakes import install_fakes
+    from tools.common import upsert_documents
+    from tools.vector_search import retrieve_documents
+
+    install_fakes()
+    queries = make_queries(args.queries, rng)
+    relevant = {q: set() for q in range(len(queries))}
+    today = datetime.date.today()
+    batch = []
+    for doc_id, text, q in make_corpus(size, queries, args.relevant, rng):
+        if q is not None:
+            relevant[q].add(doc_id)
+        batch.append((text, f"https://bench.example/{doc_id}", today, doc_id))
+        if len(batch) >= 512:
+            upsert_documents(batch)
+            batch = []
+    upsert_documents(batch)
+
+    results = []
+    for mode in ("vector", "hybrid"):
+        latencies, recalls = [], []
+        for q, query in enumerate(queries):
+            for text in (query["keyword"], query["question"]):
+                t0 = time.perf_counter()
+                docs = retrieve_documents(text, k=args.k, mode=mode)
+                latencies.append(time.perf_counter() - t0)
+                if relevant[q]:
+                    found = {d.metadata.get("source") for d in docs}
+                    recalls.append(len(found & relevant[q]) / len(relevant[q]))
+        results.append({
+            "size": size, "mode": mode,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "recall": statistics.mean(recalls) if recalls else 0.0,
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--relevant", type=int, default=5, help="Planted relevant documents per query.")
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--hybrid", action="store_true", help="Also measure vector and hybrid retrieval.")
+    parser.add_argument("--hybrid-max", type=int, default=100_000,
+                        help="Largest corpus to load into the vector store for --hybrid.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'docs':>9}  {'mode':>7}  {'build docs/s':>12}  {'p50 ms':>7}  {'p99 ms':>7}  {'recall@' + str(args.k):>9}")
+    for size in args.sizes:
+        row = bench_lexical(size, args, random.Random(args.seed))
+        print(f"{size:>9}  {'bm25':>7}  {row['build_docs_per_s']:>12.0f}  {row['p50_ms']:>7.2f}  "
+              f"{row['p99_ms']:>7.2f}  {row['recall']:>9.3f}")
+        if args.hybrid and size <= args.hybrid_max:
+            for row in bench_hybrid(size, args, random.Random(args.seed)):
+                print(f"{size:>9}  {row['mode']:>7}  {'':>12}  {row['p50_ms']:>7.2f}  "
+                      f"{row['p99_ms']:>7.2f}  {row['recall']:>9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# benchmarks/startup.py
+"""
+Measures cold-start time of the main entry points.
+
+Each target runs in a fresh interpreter so nothing is shared between
+samples. Run it on two checkouts to compare before and after a change:
+
+    python benchmarks/startup.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "import tools": "import tools",
+    "import config": "import config",
+    "main.py startup": "from graph import create_agent_graph; create_agent_graph()",
+}
+
+def time_target(code: str, runs: int) -> list:
+    """Returns wall-clock seconds for `runs` fresh-interpreter executions of `code`."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=AGENT_DIR, check=True)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Samples per target.")
+    args = parser.parse_args()
+
+    print(f"{'target':<20} {'median':>8} {'min':>8} {'max':>8}")
+    for name, code in TARGETS.items():
+        samples = time_target(code, args.runs)
+        print(f"{name:<20} {statistics.median(samples):>7.2f}s {min(samples):>7.2f}s {max(samples):>7.2f}s")
+
+if __name__ == "__main__":
+    main()
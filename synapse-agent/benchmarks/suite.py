@@ -0,0 +1,215 @@
+# benchmarks/suite.py
+"""
+Runs the whole pipeline offline against local fakes and records the results over time.
+
+For each corpus size a fresh subprocess installs benchmarks.fakes with
+network=True (fake Gemini and embeddings, a fake `tavily` and `yfinance`,
+and GDELT, article pages and RSS feeds served from a local HTTP server),
+preloads a synthetic corpus into a temporary vector store, then measures:
+
+  - ingest: synthetic documents per second through upsert_documents, and
+    articles per second through the RSS import path (fetch, extract, chunk, store)
+  - retrieval: retrieve_documents queries per second at that corpus size
+  - end to end: app.invoke() on the graph from create_agent_graph, with
+    latency percentiles and per-stage means taken from telemetry spans
+  - peak RSS of the run
+
+Each run appends one JSON line per size to --output (with the git commit,
+a label and the settings), so results can be compared across changes:
+
+    python benchmarks/suite.py --sizes 1000 10000 50000 --label baseline
+    python benchmarks/suite.py --sizes 1000 10000 50000 --label pooled-http --compare
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_OUTPUT = os.path.join(ROOT, "benchmarks", "results", "suite.jsonl")
+QUERIES = [
+    "How did NVDA's latest earnings affect its outlook?",
+    "What is the market saying about AAPL and MSFT this week?",
+    "Impact of new semiconductor export controls on TSM",
+    "How are rising rates affecting regional bank stocks?",
+]
+# Metrics shown by --compare, with whether a higher value is better.
+HEADLINE = [("e2e_p50_s", False), ("e2e_p95_s", False), ("ingest_docs_per_s", True),
+            ("article_ingest_per_s", True), ("retrieval_qps", True), ("peak_rss_mb", False)]
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+def preload_corpus(size: int, rng: random.Random) -> float:
+    """Stores `size` synthetic documents; returns documents per second."""
+    from benchmarks.retrieval import make_corpus, make_queries
+    from tools.common import upsert_documents
+
+    today = datetime.date.today()
+    start = time.perf_counter()
+    batch = []
+    for doc_id, text, _ in make_corpus(size, make_queries(20, rng), 5, rng):
+        batch.append((text, f"https://bench.example/{doc_id}", today, "bench"))
+        if len(batch) >= 512:
+            upsert_documents(batch)
+            batch = []
+    upsert_documents(batch)
+    return size / (time.perf_counter() - start)
+
+def run_size(args) -> dict:
+    """Runs every measurement for one corpus size in this process and returns the metrics."""
+    import telemetry
+    from benchmarks import fakes
+
+    persist = tempfile.mkdtemp(prefix="synapse-suite-")
+    fakes.install_fakes(
+        plan_latency=args.plan_latency, first_token_latency=args.first_token_latency,
+        token_latency=args.token_latency, search_latency=args.search_latency,
+        quote_latency=args.quote_latency, persist_directory=persist,
+        network=True, http_latency=args.http_latency,
+    )
+    from graph import create_agent_graph
+    from tools.rss import import_from_rss
+    from tools.vector_search import retrieve_documents
+    import config
+
+    rng = random.Random(args.seed)
+    metrics = {"ingest_docs_per_s": preload_corpus(args.size, rng)}
+
+    start = time.perf_counter()
+    for i in range(args.feeds):
+        import_from_rss(f"{fakes.news_server.base_url}/rss/feed{i}")
+    seconds = time.perf_counter() - start
+    metrics["article_ingest_per_s"] = args.feeds * fakes.news_server.articles_per_query / seconds
+
+    start = time.perf_counter()
+    for i in range(args.retrievals):
+        retrieve_documents(QUERIES[i % len(QUERIES)], k=config.CONTEXT_CANDIDATE_DOCS)
+    metrics["retrieval_qps"] = args.retrievals / (time.perf_counter() - start)
+
+    app = create_agent_graph()
+    telemetry.set_enabled(True)
+    telemetry.reset()
+    latencies = []
+    for i in range(args.runs):
+        start = time.perf_counter()
+        app.invoke({"original_query": QUERIES[i % len(QUERIES)]})
+        latencies.append(time.perf_counter() - start)
+    metrics.update(
+        e2e_p50_s=percentile(latencies, 50),
+        e2e_p95_s=percentile(latencies, 95),
+        e2e_mean_s=statistics.mean(latencies),
+    )
+    metrics["stages"] = {key: {"count": stats["count"], "mean_s": stats["mean_seconds"]}
+                         for key, stats in sorted(telemetry.snapshot().items())}
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    fakes.news_server.shutdown()
+    return metrics
+
+def last_records(path: str, exclude_ts: str) -> dict:
+    """The most recent earlier record for each size in the results file."""
+    previous = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("ts") != exclude_ts:
+                    previous[record["size"]] = record
+    return previous
+
+def print_comparison(record: dict, previous: dict) -> None:
+    label = previous.get("label") or previous.get("commit") or previous["ts"]
+    print(f"  vs {label}:")
+    for metric, higher_is_better in HEADLINE:
+        old, new = previous["metrics"].get(metric), record["metrics"].get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        better = change > 0 if higher_is_better else change < 0
+        print(f"    {metric:<22} {old:>10.3f} -> {new:>10.3f}  ({change:+.1f}%{', better' if better else ''})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--runs", type=int, default=8, help="End-to-end graph runs per size.")
+    parser.add_argument("--retrievals", type=int, default=200)
+    parser.add_argument("--feeds", type=int, default=4, help="RSS feeds to ingest per size.")
+    parser.add_argument("--plan-latency", type=float, default=0.3)
+    parser.add_argument("--first-token-latency", type=float, default=0.5)
+    parser.add_argument("--token-latency", type=float, default=0.005)
+    parser.add_argument("--search-latency", type=float, default=0.3, help="Fake Tavily latency.")
+    parser.add_argument("--http-latency", type=float, default=0.05,
+                        help="Local GDELT, article page and RSS latency.")
+    parser.add_argument("--quote-latency", type=float, default=0.2, help="Fake yfinance latency.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--label", default="", help="A name for this run, e.g. the change being measured.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSONL file the results are appended to.")
+    parser.add_argument("--compare", action="store_true", help="Compare with the previous run of each size.")
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)  # set for the per-size child process
+    args = parser.parse_args()
+
+    if args.size is not None:
+        print(json.dumps(run_size(args)))
+        return
+
+    ts = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+    settings = {key: getattr(args, key) for key in (
+        "runs", "retrievals", "feeds", "plan_latency", "first_token_latency", "token_latency",
+        "search_latency", "http_latency", "quote_latency", "seed")}
+    previous = last_records(args.output, ts) if args.compare else {}
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    for size in args.sizes:
+        print(f"---SUITE: {size} documents---")
+        # A fresh process per size keeps the corpora apart and makes peak RSS per size.
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), *sys.argv[1:], "--size", str(size)],
+                               capture_output=True, text=True, cwd=ROOT)
+        if child.returncode != 0:
+            print(child.stderr[-2000:])
+            continue
+        metrics = json.loads(child.stdout.strip().splitlines()[-1])
+        record = {"ts": ts, "commit": git_commit(), "label": args.label, "size": size,
+                  "settings": settings, "metrics": metrics}
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+        print(f"  end to end   p50 {metrics['e2e_p50_s']:.3f}s  p95 {metrics['e2e_p95_s']:.3f}s")
+        print(f"  ingest       {metrics['ingest_docs_per_s']:.0f} docs/s, "
+              f"{metrics['article_ingest_per_s']:.1f} articles/s")
+        print(f"  retrieval    {metrics['retrieval_qps']:.1f} queries/s")
+        print(f"  peak RSS     {metrics['peak_rss_mb']:.0f} MB")
+        for key, stats in metrics["stages"].items():
+            if key.startswith(("node:", "tool:", "llm:")):
+                print(f"    {key:<34} x{stats['count']:<4} mean {stats['mean_s'] * 1000:8.1f} ms")
+        if size in previous:
+            print_comparison(record, previous[size])
+
+if __name__ == "__main__":
+    main()
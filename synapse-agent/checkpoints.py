@@ -0,0 +1,114 @@
+# checkpoints.py
+"""
+Persistent graph checkpoints, so a failed or interrupted run resumes from
+its last completed node instead of repeating every LLM and search call.
+
+The graph is compiled with a LangGraph SQLite checkpointer that saves the
+state after each step under the run's thread ID. A small `runs` table in
+the same database records each run's query and status, for finding the runs
+that can be resumed and for the retention policy: finished runs are dropped
+straight away unless CHECKPOINT_KEEP_COMPLETED is set, and every run older
+than CHECKPOINT_RETENTION is dropped.
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+def new_thread_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+def run_config(thread_id: str, recursion_limit: int = 25) -> Dict:
+    """The graph config that ties a run to its checkpoints."""
+    return {"recursion_limit": recursion_limit, "configurable": {"thread_id": thread_id}}
+
+class CheckpointStore:
+    """The checkpointer to compile the graph with, plus the registry of runs using it."""
+
+    def __init__(self, path: str, keep_completed: bool = False):
+        try:
+            from langgraph.checkpoint.sqlite import SqliteSaver
+        except ImportError as e:
+            raise ImportError(
+                "Checkpointing needs the langgraph-checkpoint-sqlite package "
+                "(pip install langgraph-checkpoint-sqlite), or set CHECKPOINT_ENABLED=false."
+            ) from e
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.keep_completed = keep_completed
+        saver_conn = sqlite3.connect(path, check_same_thread=False)
+        saver_conn.execute("PRAGMA journal_mode=WAL")
+        self.saver = SqliteSaver(saver_conn)
+        self.saver.setup()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "thread_id TEXT PRIMARY KEY, query TEXT NOT NULL, status TEXT NOT NULL, "
+            "error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def start(self, thread_id: str, query: str) -> None:
+        """Registers a new run, or marks a resumed one as running again."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (thread_id, query, status, created_at, updated_at) VALUES (?, ?, 'running', ?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET status = 'running', error = NULL, updated_at = excluded.updated_at",
+                (thread_id, query, now, now),
+            )
+            self._conn.commit()
+
+    def fail(self, thread_id: str, error: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE runs SET status = 'failed', error = ?, updated_at = ? WHERE thread_id = ?",
+                               (error, time.time(), thread_id))
+            self._conn.commit()
+
+    def complete(self, thread_id: str) -> None:
+        """Marks a run finished; its checkpoints are deleted unless completed runs are kept."""
+        if not self.keep_completed:
+            self.delete(thread_id)
+            return
+        with self._lock:
+            self._conn.execute("UPDATE runs SET status = 'completed', error = NULL, updated_at = ? WHERE thread_id = ?",
+                               (time.time(), thread_id))
+            self._conn.commit()
+
+    def get(self, thread_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT thread_id, query, status, error, updated_at FROM runs WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+        return dict(zip(("thread_id", "query", "status", "error", "updated_at"), row)) if row else None
+
+    def resumable(self, limit: int = 10) -> List[Dict]:
+        """Failed or interrupted runs, most recent first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_id, query, status, error, updated_at FROM runs "
+                "WHERE status != 'completed' ORDER BY updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(zip(("thread_id", "query", "status", "error", "updated_at"), row)) for row in rows]
+
+    def delete(self, thread_id: str) -> None:
+        self.saver.delete_thread(thread_id)
+        with self._lock:
+            self._conn.execute("DELETE FROM runs WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+
+    def prune(self, max_age: float) -> int:
+        """Deletes runs (and their checkpoints) not updated for `max_age` seconds. Returns how many."""
+        with self._lock:
+            stale = [row[0] for row in self._conn.execute(
+                "SELECT thread_id FROM runs WHERE updated_at < ?", (time.time() - max_age,)
+            )]
+        for thread_id in stale:
+            self.delete(thread_id)
+        return len(stale)
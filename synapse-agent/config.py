@@ -2,28 +2,289 @@
 """
 Centralized configuration and service initialization.
 """
+import os
+import threading
 from dotenv import load_dotenv
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-from langchain_google_genai import ChatGoogleGenerativeAI
 
 load_dotenv()
+# The heavy shared services (EMBED_MODEL, VECTOR_DB, LEXICAL_INDEX, LLM_GEMINI, ...)
+# are created lazily on first attribute access, so importing this module is
+# cheap. Access them as `config.VECTOR_DB` at call time rather than
+# `from config import ...` at import time, which would defeat the laziness.
+# Factories that need another service call __getattr__ for it explicitly,
+# since module __getattr__ does not apply to bare global names.
+
 # --- Embedding Model ---
-# Initializes the sentence-transformer model for creating vector embeddings.
-EMBED_MODEL = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+# The sentence-transformer model for creating vector embeddings, behind a
+# persistent on-disk cache so repeated text is only embedded once.
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "./cache/embeddings.sqlite")
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "200000"))
+
+# EMBED_BACKEND is "torch" (PyTorch through HuggingFaceEmbeddings) or "onnx":
+# the int8-quantized ONNX export of the same model (EMBED_ONNX_FILE, from the
+# model's repository; pick the variant for your CPU, e.g. _avx512_vnni or
+# _arm64), which needs `pip install 'sentence-transformers[onnx]'`. With
+# "onnx", document batches of at least EMBED_POOL_MIN_BATCH texts are spread
+# over EMBED_POOL_WORKERS processes (0 or 1 disables the pool) using
+# EMBED_POOL_THREADS threads each, while queries are encoded in-process with
+# EMBED_THREADS threads (0 keeps the runtime default).
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()
+EMBED_ONNX_FILE = os.getenv("EMBED_ONNX_FILE", "onnx/model_qint8_avx2.onnx")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0"))
+EMBED_POOL_WORKERS = int(os.getenv("EMBED_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+EMBED_POOL_MIN_BATCH = int(os.getenv("EMBED_POOL_MIN_BATCH", "256"))
+EMBED_POOL_THREADS = int(os.getenv("EMBED_POOL_THREADS", "1"))
+
+def _create_embed_model():
+    from embeddings import CachedEmbeddings, LocalEmbeddings
+    if EMBED_BACKEND == "onnx":
+        underlying = LocalEmbeddings(
+            EMBED_MODEL_NAME, backend="onnx", onnx_file=EMBED_ONNX_FILE, batch_size=EMBED_BATCH_SIZE,
+            threads=EMBED_THREADS, pool_workers=EMBED_POOL_WORKERS, pool_min_batch=EMBED_POOL_MIN_BATCH,
+            pool_threads=EMBED_POOL_THREADS,
+        )
+    else:
+        from langchain_huggingface import HuggingFaceEmbeddings
+        underlying = HuggingFaceEmbeddings(model_name=EMBED_MODEL_NAME,
+                                           encode_kwargs={"batch_size": EMBED_BATCH_SIZE})
+    return CachedEmbeddings(
+        underlying,
+        # Quantized vectors differ slightly, so each backend has its own cache entries.
+        model_name=EMBED_MODEL_NAME if EMBED_BACKEND == "torch" else f"{EMBED_MODEL_NAME}:{EMBED_BACKEND}",
+        path=EMBED_CACHE_PATH,
+        max_entries=EMBED_CACHE_MAX_ENTRIES,
+    )
 
 # --- Vector Database ---
-# Initializes the Chroma vector store with a persistent directory.
-VECTOR_DB = Chroma(
-    collection_name="news_plus_static",
-    persist_directory="./news_chroma",
-    embedding_function=EMBED_MODEL
-)
+# Weekly Chroma collections in a persistent directory. Partitions that ended
+# more than VECTOR_DB_RETENTION_DAYS ago are dropped as a whole.
+VECTOR_DB_RETENTION_DAYS = int(os.getenv("VECTOR_DB_RETENTION_DAYS", "45"))
+
+def _create_vector_db():
+    from vector_store import PartitionedVectorStore
+    return PartitionedVectorStore(
+        persist_directory="./news_chroma",
+        embedding=__getattr__("EMBED_MODEL"),
+        retention_days=VECTOR_DB_RETENTION_DAYS,
+        legacy_collection="news_plus_static",
+    )
+
+# --- Lexical Index and Retrieval ---
+# A BM25 index over the same documents as VECTOR_DB, rebuilt from the store on
+# first use and updated on every ingest. RETRIEVAL_MODE is "hybrid" (fuse BM25
+# and vector rankings, or answer from BM25 alone when it is confident),
+# "vector" or "lexical". BM25 is confident when at least k documents contain
+# every query term and one of the terms is rarer than RETRIEVAL_LEXICAL_MIN_IDF.
+# Results are reranked with MMR (in "vector" mode, kept in vector order), and
+# snippets whose term overlap with a better one reaches
+# RETRIEVAL_DUPLICATE_SIMILARITY (Jaccard) are dropped. This is the only
+# de-duplication pass; the analyst's context relies on it.
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+RETRIEVAL_CANDIDATE_FACTOR = int(os.getenv("RETRIEVAL_CANDIDATE_FACTOR", "3"))
+RETRIEVAL_LEXICAL_MIN_IDF = float(os.getenv("RETRIEVAL_LEXICAL_MIN_IDF", "3.0"))
+RETRIEVAL_MMR_LAMBDA = float(os.getenv("RETRIEVAL_MMR_LAMBDA", "0.7"))
+RETRIEVAL_DUPLICATE_SIMILARITY = float(os.getenv("RETRIEVAL_DUPLICATE_SIMILARITY", "0.8"))
+# How often (seconds) a query first picks up documents other processes stored.
+RETRIEVAL_LEXICAL_SYNC_INTERVAL = float(os.getenv("RETRIEVAL_LEXICAL_SYNC_INTERVAL", "60"))
+
+def _create_lexical_index():
+    from lexical_index import LexicalIndex
+    return LexicalIndex.from_vector_store(__getattr__("VECTOR_DB"), retention_days=VECTOR_DB_RETENTION_DAYS)
+
+# --- Analyst Context ---
+# The analyst retrieves CONTEXT_CANDIDATE_DOCS snippets and fits the best of
+# them, ranked by relevance and recency, into CONTEXT_TOKEN_BUDGET estimated
+# tokens, together with the stock data (which may use at most half of the budget).
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+CONTEXT_CANDIDATE_DOCS = int(os.getenv("CONTEXT_CANDIDATE_DOCS", "16"))
+CONTEXT_MAX_SNIPPET_TOKENS = int(os.getenv("CONTEXT_MAX_SNIPPET_TOKENS", "350"))
+CONTEXT_RECENCY_WEIGHT = float(os.getenv("CONTEXT_RECENCY_WEIGHT", "0.3"))
+CONTEXT_RECENCY_HALF_LIFE_DAYS = float(os.getenv("CONTEXT_RECENCY_HALF_LIFE_DAYS", "7"))
 
 # --- Large Language Model ---
-# Initializes the Google Gemini model for the agent's reasoning capabilities.
-LLM_GEMINI = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    temperature=0,
-)
+# The Google Gemini model for the agent's reasoning capabilities.
+def _create_llm_gemini():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model="gemini-1.5-flash",
+        temperature=0,
+    )
+
+# --- LLM Response Cache ---
+# Local SQLite cache for research plans and reports. Plans can also be reused
+# for semantically similar queries within LLM_CACHE_PLAN_MAX_DISTANCE (cosine)
+# that name the same companies and tickers.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./cache/llm_responses.sqlite")
+LLM_CACHE_PLAN_TTL = float(os.getenv("LLM_CACHE_PLAN_TTL", "3600"))
+LLM_CACHE_REPORT_TTL = float(os.getenv("LLM_CACHE_REPORT_TTL", "900"))
+LLM_CACHE_SEMANTIC = os.getenv("LLM_CACHE_SEMANTIC", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_PLAN_MAX_DISTANCE = float(os.getenv("LLM_CACHE_PLAN_MAX_DISTANCE", "0.08"))
+
+def _create_llm_cache():
+    from llm_cache import ResponseCache
+    return ResponseCache(LLM_CACHE_PATH)
+
+# --- Symbol Table ---
+# Tickers, company names and aliases for resolving and validating tickers
+# locally (tools/symbols.py). SYMBOLS_PATH is a TSV (the bundled seed covers
+# large caps, indices and ETFs); it is compiled to a memory-mapped index at
+# SYMBOLS_INDEX_PATH. With SYMBOLS_STRICT, tickers missing from the table are
+# rejected before any market-data call, which suits a full exchange listing.
+# SYMBOLS_FAST_PATH plans simple ticker questions without calling the LLM.
+SYMBOLS_PATH = os.getenv("SYMBOLS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "symbols.tsv"))
+SYMBOLS_INDEX_PATH = os.getenv("SYMBOLS_INDEX_PATH", f"./cache/{os.path.basename(SYMBOLS_PATH)}.idx")
+SYMBOLS_STRICT = os.getenv("SYMBOLS_STRICT", "false").lower() in ("1", "true", "yes")
+SYMBOLS_FAST_PATH = os.getenv("SYMBOLS_FAST_PATH", "true").lower() in ("1", "true", "yes")
+
+def _create_symbols():
+    from tools.symbols import load_symbol_table
+    return load_symbol_table(SYMBOLS_PATH, SYMBOLS_INDEX_PATH)
+
+_SERVICE_FACTORIES = {
+    "EMBED_MODEL": _create_embed_model,
+    "VECTOR_DB": _create_vector_db,
+    "LEXICAL_INDEX": _create_lexical_index,
+    "LLM_GEMINI": _create_llm_gemini,
+    "LLM_CACHE": _create_llm_cache,
+    "SYMBOLS": _create_symbols,
+}
+# Re-entrant because creating VECTOR_DB first creates EMBED_MODEL.
+_services_lock = threading.RLock()
+
+def __getattr__(name):
+    """Creates a shared service on first access and caches it as a module global."""
+    factory = _SERVICE_FACTORIES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _services_lock:
+        if name not in globals():
+            globals()[name] = factory()
+    return globals()[name]
+
+def loaded(name: str) -> bool:
+    """Whether a shared service has already been created in this process."""
+    return name in globals()
+
+def warm_up(*names: str) -> None:
+    """
+    Eagerly creates the named services (all of them by default).
+    Long-running processes can call this at startup so the first query
+    does not pay for model loading.
+    """
+    for name in names or _SERVICE_FACTORIES:
+        __getattr__(name)
+
+# --- Checkpoints ---
+# Graph state is saved to CHECKPOINT_PATH after every step, so a failed or
+# interrupted REPL run resumes from its last completed node (`resume` in
+# main.py). Finished runs are deleted unless CHECKPOINT_KEEP_COMPLETED is set;
+# any run not updated for CHECKPOINT_RETENTION seconds is deleted at startup.
+CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "true").lower() in ("1", "true", "yes")
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "./cache/checkpoints.sqlite")
+CHECKPOINT_KEEP_COMPLETED = os.getenv("CHECKPOINT_KEEP_COMPLETED", "false").lower() in ("1", "true", "yes")
+CHECKPOINT_RETENTION = float(os.getenv("CHECKPOINT_RETENTION", str(7 * 86400)))
+
+# --- Search Fan-out ---
+# Bounds for the SearchSpecialist's concurrent search stage. Timeouts are in
+# seconds; concurrency is the maximum number of in-flight calls per source.
+SEARCH_CALL_TIMEOUT = float(os.getenv("SEARCH_CALL_TIMEOUT", "20"))
+SEARCH_NODE_DEADLINE = float(os.getenv("SEARCH_NODE_DEADLINE", "45"))
+SEARCH_SOURCE_CONCURRENCY = {
+    "tavily": int(os.getenv("SEARCH_TAVILY_CONCURRENCY", "4")),
+    "gdelt": int(os.getenv("SEARCH_GDELT_CONCURRENCY", "2")),
+}
+SEARCH_USE_GDELT = os.getenv("SEARCH_USE_GDELT", "false").lower() in ("1", "true", "yes")
+GDELT_API_URL = os.getenv("GDELT_API_URL", "https://api.gdeltproject.org/api/v2/doc/doc")
+
+# SearchSpecialist skips a source whose recent latency exceeds this (seconds)
+# until HTTP_BREAKER_COOLDOWN has passed, as it does for failing sources.
+SEARCH_SLOW_SOURCE_SECONDS = float(os.getenv("SEARCH_SLOW_SOURCE_SECONDS", "15"))
+
+# --- HTTP Transport ---
+# Shared by every outbound tool (tools/transport.py): connection pool size,
+# concurrent requests per host, default timeout (seconds), retries for
+# timeouts, connection errors, 429 and 5xx with jittered exponential backoff
+# between HTTP_BACKOFF_BASE and HTTP_BACKOFF_MAX seconds, and the circuit
+# breaker, which opens after HTTP_BREAKER_FAILURES consecutive failures and
+# lets a probe through after HTTP_BREAKER_COOLDOWN seconds.
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", os.getenv("ARTICLE_PER_HOST_LIMIT", "4")))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "8"))
+HTTP_BREAKER_FAILURES = int(os.getenv("HTTP_BREAKER_FAILURES", "5"))
+HTTP_BREAKER_COOLDOWN = float(os.getenv("HTTP_BREAKER_COOLDOWN", "60"))
+
+# --- Local Coverage Check ---
+# Before searching the web, a planned query is answered from the local store
+# when at least SEARCH_COVERAGE_MIN_DOCS documents (from SEARCH_COVERAGE_MIN_SOURCES
+# distinct sources) reach SEARCH_COVERAGE_MIN_SIMILARITY and the newest of them
+# was ingested within SEARCH_COVERAGE_MAX_STALENESS seconds.
+SEARCH_COVERAGE_ENABLED = os.getenv("SEARCH_COVERAGE_ENABLED", "true").lower() in ("1", "true", "yes")
+SEARCH_COVERAGE_MIN_DOCS = int(os.getenv("SEARCH_COVERAGE_MIN_DOCS", "5"))
+SEARCH_COVERAGE_MIN_SOURCES = int(os.getenv("SEARCH_COVERAGE_MIN_SOURCES", "1"))
+SEARCH_COVERAGE_MIN_SIMILARITY = float(os.getenv("SEARCH_COVERAGE_MIN_SIMILARITY", "0.6"))
+SEARCH_COVERAGE_MAX_STALENESS = float(os.getenv("SEARCH_COVERAGE_MAX_STALENESS", "21600"))
+
+# --- Article Fetching ---
+# Full-text ingestion for GDELT and RSS results: concurrency, page
+# timeout (seconds), maximum body size (bytes), chunking (characters) and the
+# number of chunks embedded per batch.
+ARTICLE_FETCH_ENABLED = os.getenv("ARTICLE_FETCH_ENABLED", "true").lower() in ("1", "true", "yes")
+ARTICLE_FETCH_WORKERS = int(os.getenv("ARTICLE_FETCH_WORKERS", "16"))
+ARTICLE_TIMEOUT = float(os.getenv("ARTICLE_TIMEOUT", "10"))
+ARTICLE_MAX_BYTES = int(os.getenv("ARTICLE_MAX_BYTES", "2000000"))
+ARTICLE_CHUNK_SIZE = int(os.getenv("ARTICLE_CHUNK_SIZE", "1200"))
+ARTICLE_CHUNK_OVERLAP = int(os.getenv("ARTICLE_CHUNK_OVERLAP", "200"))
+ARTICLE_EMBED_BATCH = int(os.getenv("ARTICLE_EMBED_BATCH", "64"))
+
+# --- Feed Watcher ---
+# Sources and schedules for the background ingestion daemon (watcher.py).
+# Feeds are comma-separated URLs; GDELT queries are semicolon-separated.
+# Intervals and backoff are in seconds; jitter is a fraction of the interval.
+WATCH_FEEDS = [url.strip() for url in os.getenv("WATCH_FEEDS", "").split(",") if url.strip()]
+WATCH_GDELT_QUERIES = [q.strip() for q in os.getenv("WATCH_GDELT_QUERIES", "").split(";") if q.strip()]
+WATCH_FEED_INTERVAL = float(os.getenv("WATCH_FEED_INTERVAL", "900"))
+WATCH_GDELT_INTERVAL = float(os.getenv("WATCH_GDELT_INTERVAL", "1800"))
+WATCH_JITTER = float(os.getenv("WATCH_JITTER", "0.1"))
+WATCH_MAX_BACKOFF = float(os.getenv("WATCH_MAX_BACKOFF", "21600"))
+WATCH_WORKERS = int(os.getenv("WATCH_WORKERS", "4"))
+WATCH_STATE_PATH = os.getenv("WATCH_STATE_PATH", "./cache/watcher.sqlite")
+WATCH_SEEN_RETENTION = float(os.getenv("WATCH_SEEN_RETENTION", str(90 * 86400)))
+
+# --- API Server ---
+# Concurrency, queue depth and per-request timeout (seconds) for server.py.
+SERVER_MAX_CONCURRENCY = int(os.getenv("SERVER_MAX_CONCURRENCY", "8"))
+SERVER_MAX_QUEUE = int(os.getenv("SERVER_MAX_QUEUE", "32"))
+SERVER_REQUEST_TIMEOUT = float(os.getenv("SERVER_REQUEST_TIMEOUT", "120"))
+
+# --- Telemetry ---
+# Spans for graph nodes, tools, embedding batches, vector queries and LLM
+# calls (see telemetry.py). Off by default; telemetry.set_enabled() or the
+# server's /telemetry endpoint switches it at runtime. Spans are logged as
+# JSON lines to TELEMETRY_LOG_PATH ("-" for stderr) and Prometheus metrics
+# are rewritten to TELEMETRY_METRICS_PATH every TELEMETRY_METRICS_INTERVAL
+# seconds, when those are set.
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "false").lower() in ("1", "true", "yes")
+TELEMETRY_LOG_PATH = os.getenv("TELEMETRY_LOG_PATH", "")
+TELEMETRY_METRICS_PATH = os.getenv("TELEMETRY_METRICS_PATH", "")
+TELEMETRY_METRICS_INTERVAL = float(os.getenv("TELEMETRY_METRICS_INTERVAL", "15"))
+
+# --- Batch Mode ---
+# Worker threads for planning and report writing in batch.py, and the overall
+# budget (seconds) for the shared, de-duplicated search stage.
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "8"))
+BATCH_SEARCH_DEADLINE = float(os.getenv("BATCH_SEARCH_DEADLINE", "600"))
 
+# --- Market Data ---
+# TTLs (seconds) for the in-memory quote/history caches, for symbols that
+# yfinance reported as missing, and for the on-disk Parquet history cache.
+MARKET_QUOTE_TTL = float(os.getenv("MARKET_QUOTE_TTL", "60"))
+MARKET_HISTORY_TTL = float(os.getenv("MARKET_HISTORY_TTL", "900"))
+MARKET_NEGATIVE_TTL = float(os.getenv("MARKET_NEGATIVE_TTL", "21600"))
+MARKET_DISK_TTL = float(os.getenv("MARKET_DISK_TTL", "43200"))
+MARKET_CACHE_DIR = os.getenv("MARKET_CACHE_DIR", "./cache/market")
@@ -0,0 +1,254 @@
+# embeddings.py
+"""
+Embedding backends: a persistent, content-addressed cache in front of the
+embedding model, and a sentence-transformers encoder that can run an
+int8-quantized ONNX export of the model and spread large batches over a
+pool of worker processes.
+"""
+import atexit
+import hashlib
+import math
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+import telemetry
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings model with an on-disk SQLite cache.
+
+    Vectors are keyed by a hash of the model name and the text, stored as
+    float32 blobs, and evicted least-recently-used once the cache holds more
+    than `max_entries` vectors. Both document and query embeddings go through
+    the cache, so repeated text never reaches the underlying model twice.
+    This assumes a symmetric model (queries and documents are encoded the
+    same way), which holds for all-MiniLM-L6-v2.
+    """
+
+    def __init__(self, underlying: Embeddings, model_name: str, path: str, max_entries: int = 200_000):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Fetches cached vectors for `keys` and marks them as recently used."""
+        found = {}
+        now = time.time()
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit.
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return found
+
+    def _store(self, vectors: Dict[str, List[float]]) -> None:
+        """Writes new vectors and evicts the least-recently-used overflow."""
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in vectors.items()],
+            )
+            self._size += self._conn.total_changes - before
+            overflow = self._size - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (overflow,)
+                )
+                self._size -= overflow
+            self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embeds a batch of texts, computing only the ones not already cached."""
+        with telemetry.span("embedding", "embed_documents", documents=len(texts)) as span:
+            keys = [self._key(text) for text in texts]
+            cached = self._lookup(list(set(keys)))
+
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in cached and key not in missing:
+                    missing[key] = text
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+            span.set(cache_hits=len(texts) - len(missing), cache_misses=len(missing))
+
+            if missing:
+                computed = self.underlying.embed_documents(list(missing.values()))
+                new_vectors = dict(zip(missing, computed))
+                self._store(new_vectors)
+                cached.update(new_vectors)
+            return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embeds a single query string through the cache."""
+        with telemetry.span("embedding", "embed_query") as span:
+            key = self._key(text)
+            cached = self._lookup([key])
+            if key in cached:
+                self.hits += 1
+                span.set(cache_hits=1)
+                return cached[key]
+            self.misses += 1
+            span.set(cache_misses=1)
+            vector = self.underlying.embed_query(text)
+            self._store({key: vector})
+            return vector
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hit/miss counters and the current cache size."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": self._size,
+        }
+
+def load_sentence_transformer(model_name: str, backend: str = "torch", onnx_file: Optional[str] = None,
+                              threads: int = 0):
+    """
+    Loads `model_name` with sentence-transformers on the torch or ONNX
+    backend, limited to `threads` intra-op threads (0 keeps the runtime's default).
+    """
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError as e:
+        raise ImportError("Local embeddings need sentence-transformers: pip install sentence-transformers") from e
+
+    if backend == "torch":
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        return SentenceTransformer(model_name, device="cpu")
+    if backend != "onnx":
+        raise ValueError(f"Unknown embedding backend {backend!r}; expected 'torch' or 'onnx'.")
+
+    try:
+        import onnxruntime
+        import optimum.onnxruntime  # noqa: F401  (sentence-transformers loads ONNX models through optimum)
+    except ImportError as e:
+        raise ImportError(
+            "EMBED_BACKEND=onnx needs onnxruntime and optimum: pip install 'sentence-transformers[onnx]'"
+        ) from e
+    options = onnxruntime.SessionOptions()
+    if threads:
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+    model_kwargs = {"provider": "CPUExecutionProvider", "session_options": options}
+    if onnx_file:
+        model_kwargs["file_name"] = onnx_file
+    return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+# The model loaded by each encoder pool worker.
+_worker_model = None
+
+def _init_worker(model_name: str, backend: str, onnx_file: Optional[str], threads: int) -> None:
+    global _worker_model
+    _worker_model = load_sentence_transformer(model_name, backend, onnx_file, threads)
+
+def _encode_in_worker(texts: List[str], batch_size: int) -> bytes:
+    vectors = _worker_model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+    return vectors.astype("float32").tobytes()
+
+class LocalEmbeddings(Embeddings):
+    """
+    A sentence-transformers model on the CPU, on the torch or ONNX backend.
+
+    Queries and small batches are encoded in-process, so query latency stays
+    low. Document batches of at least `pool_min_batch` texts are split into
+    chunks and encoded by `pool_workers` worker processes (each limited to
+    `pool_threads` threads, so they do not contend for cores); the pool is
+    started on first use.
+    """
+
+    def __init__(self, model_name: str, backend: str = "torch", onnx_file: Optional[str] = None,
+                 batch_size: int = 64, threads: int = 0, pool_workers: int = 0,
+                 pool_min_batch: int = 256, pool_threads: int = 1):
+        self.model_name = model_name
+        self.backend = backend
+        self.onnx_file = onnx_file
+        self.batch_size = batch_size
+        self.pool_workers = pool_workers
+        self.pool_min_batch = pool_min_batch
+        self.pool_threads = pool_threads
+        self._model = load_sentence_transformer(model_name, backend, onnx_file, threads)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Spawned rather than forked: forking a process that holds
+                # torch or onnxruntime thread pools can deadlock the child.
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.pool_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.model_name, self.backend, self.onnx_file, self.pool_threads),
+                )
+                atexit.register(self.close)
+            return self._pool
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        return self._model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.pool_workers < 2 or len(texts) < self.pool_min_batch:
+            return self._encode(texts)
+
+        import numpy as np
+
+        # One chunk per worker, in whole encode batches, so every worker stays busy.
+        size = self.batch_size * math.ceil(len(texts) / self.pool_workers / self.batch_size)
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+        with telemetry.span("embedding", "encoder_pool", documents=len(texts)):
+            results = self._get_pool().map(_encode_in_worker, chunks, [self.batch_size] * len(chunks))
+            return [row for chunk, blob in zip(chunks, results)
+                    for row in np.frombuffer(blob, dtype=np.float32).reshape(len(chunk), -1).tolist()]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._model.encode(text, convert_to_numpy=True).tolist()
+
+    def close(self) -> None:
+        """Shuts down the worker pool, if it was started."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
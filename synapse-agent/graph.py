@@ -1,8 +1,10 @@
 # graph.py
 from typing import TypedDict, Dict, List 
 from langgraph.graph import StateGraph, END
+import telemetry
 from agents.research_manager import create_research_manager
 from agents.search_specialist import create_search_specialist
+from agents.market_data_specialist import create_market_data_specialist
 from agents.financial_analyst import create_financial_analyst
 
 class AgentState(TypedDict):
@@ -12,30 +14,63 @@ class AgentState(TypedDict):
     original_query: str
     research_plan: Dict
     search_summary: str
+    ingested_documents: int
+    search_decisions: List[Dict]
+    stock_context: str
+    retrieved_sources: List[Dict]
+    prompt_tokens: int
+    context_stats: Dict
     final_report: str
     # This field can be used for more complex routing if needed later
     next_agent: str
 
-def create_agent_graph():
+def route_after_plan(state: AgentState) -> List[str]:
+    """
+    Picks the branches to run after planning. Search and market data run
+    concurrently when the plan needs both; a branch with no work is skipped.
+    """
+    plan = state.get("research_plan") or {}
+    branches = []
+    if plan.get("search_queries"):
+        branches.append("SearchSpecialist")
+    if plan.get("stock_tickers"):
+        branches.append("MarketDataSpecialist")
+    return branches or ["FinancialAnalyst"]
+
+def create_agent_graph(checkpointer=None):
     """
     Creates and compiles the multi-agent graph.
+
+    With a `checkpointer` (e.g. checkpoints.CheckpointStore.saver) the state is saved
+    after every step, and each run must pass a thread ID in its config
+    (checkpoints.run_config); invoking the graph again with None as the input
+    and the same thread ID resumes from the last completed node.
     """
     # Initialize the graph with the state object
     workflow = StateGraph(AgentState)
 
-    # Add the agent nodes to the graph
-    workflow.add_node("ResearchManager", create_research_manager)
-    workflow.add_node("SearchSpecialist", create_search_specialist)
-    workflow.add_node("FinancialAnalyst", create_financial_analyst)
+    # Add the agent nodes to the graph, each timed as a telemetry span
+    workflow.add_node("ResearchManager", telemetry.traced("node", "ResearchManager")(create_research_manager))
+    workflow.add_node("SearchSpecialist", telemetry.traced("node", "SearchSpecialist")(create_search_specialist))
+    workflow.add_node("MarketDataSpecialist",
+                      telemetry.traced("node", "MarketDataSpecialist")(create_market_data_specialist))
+    workflow.add_node("FinancialAnalyst", telemetry.traced("node", "FinancialAnalyst")(create_financial_analyst))
 
     # Set the entry point of the graph
     workflow.set_entry_point("ResearchManager")
 
     # Define the edges (the flow of control)
-    workflow.add_edge("ResearchManager", "SearchSpecialist")
+    # After the plan, fan out to the search and market data branches; both
+    # join at the analyst, which runs once after every active branch finishes.
+    workflow.add_conditional_edges(
+        "ResearchManager",
+        route_after_plan,
+        ["SearchSpecialist", "MarketDataSpecialist", "FinancialAnalyst"],
+    )
     workflow.add_edge("SearchSpecialist", "FinancialAnalyst")
+    workflow.add_edge("MarketDataSpecialist", "FinancialAnalyst")
     workflow.add_edge("FinancialAnalyst", END) # The analyst is the final step
 
     # Compile the graph into a runnable object
-    app = workflow.compile()
+    app = workflow.compile(checkpointer=checkpointer)
     return app
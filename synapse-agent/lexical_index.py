@@ -0,0 +1,195 @@
+# lexical_index.py
+"""
+An in-process BM25 inverted index kept next to the vector store.
+
+Postings are compact typed arrays (document numbers and term frequencies)
+that grow by appending, so ingestion updates the index incrementally, and
+queries score whole posting lists at once with numpy (imported on first
+query, so importing this module stays cheap).
+"""
+import math
+import re
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import telemetry
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.&'-][a-z0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that the this to was were "
+    "what when where which who why will with about after before into over than".split()
+)
+# Expired documents are compacted out at most this often (seconds).
+_PRUNE_INTERVAL = 86400
+# 'ingested_at' is stamped before a batch is embedded, so a batch can land in
+# the store a while after its stamp; syncs look back this far (seconds).
+_SYNC_SLACK = 600
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens without stopwords; keeps tickers and terms like 's&p' or 'q3'."""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS]
+
+class LexicalHit(NamedTuple):
+    """A scored match: the stored document ID, its BM25 score and how many query terms it contains."""
+    doc_id: str
+    score: float
+    matched: int
+
+class LexicalIndex:
+    """
+    BM25 over every stored document, keyed by the same IDs as the vector store.
+
+    Each document keeps its 'timestamp' so queries can be limited to a time
+    window, and documents older than `retention_days` are compacted out of
+    the postings once a day, mirroring the vector store's retention.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, retention_days: Optional[int] = None):
+        self.k1 = k1
+        self.b = b
+        self.retention_days = retention_days
+        self._ids: List[str] = []
+        self._numbers: Dict[str, int] = {}
+        self._lengths = array("I")
+        self._timestamps = array("q")
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._total_length = 0
+        self._last_prune = time.time()
+        self.synced_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_vector_store(cls, store, **kwargs) -> "LexicalIndex":
+        """Builds the index from every document already in a PartitionedVectorStore."""
+        index = cls(**kwargs)
+        index.synced_at = time.time()
+        index.add((doc_id, text, (metadata or {}).get("timestamp", 0))
+                  for doc_id, text, metadata in store.iter_documents())
+        return index
+
+    def sync(self, store) -> int:
+        """
+        Indexes documents that reached `store` since the last sync, such as
+        those written by the feed watcher in another process.
+        """
+        since = int(self.synced_at - _SYNC_SLACK)
+        self.synced_at = time.time()
+        return self.add((doc_id, text, (metadata or {}).get("timestamp", 0))
+                        for doc_id, text, metadata in store.iter_documents(where={"ingested_at": {"$gte": since}}))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._numbers
+
+    def add(self, entries: Iterable[Tuple[str, str, int]]) -> int:
+        """
+        Indexes (doc_id, text, timestamp) entries, skipping IDs already indexed.
+        Returns the number of documents added.
+        """
+        added = 0
+        with self._lock:
+            for doc_id, text, timestamp in entries:
+                if doc_id in self._numbers or not text:
+                    continue
+                number = len(self._ids)
+                counts: Dict[str, int] = {}
+                tokens = tokenize(text)
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                for token, count in counts.items():
+                    posting = self._postings.get(token)
+                    if posting is None:
+                        posting = self._postings[token] = (array("I"), array("H"))
+                    posting[0].append(number)
+                    posting[1].append(min(count, 65535))
+                self._ids.append(doc_id)
+                self._numbers[doc_id] = number
+                self._lengths.append(len(tokens))
+                self._timestamps.append(int(timestamp or 0))
+                self._total_length += len(tokens)
+                added += 1
+        if self.retention_days is not None and time.time() - self._last_prune > _PRUNE_INTERVAL:
+            self.prune(int(time.time()) - self.retention_days * 86400)
+        return added
+
+    def idf(self, term: str) -> float:
+        """BM25 inverse document frequency of a (tokenized) term; 0.0 for unknown terms."""
+        posting = self._postings.get(term)
+        if posting is None:
+            return 0.0
+        df, n = len(posting[0]), len(self._ids)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    @telemetry.traced("vector", "bm25")
+    def search(self, query: str, k: int = 8, since_ts: Optional[int] = None) -> List[LexicalHit]:
+        """Returns up to `k` documents newer than `since_ts`, best BM25 score first."""
+        import numpy as np
+
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            n = len(self._ids)
+            if not n or not terms:
+                return []
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+            norms = self.k1 * (1 - self.b + self.b * lengths / (self._total_length / n))
+            # Dense accumulators: each posting list holds a document at most once.
+            scores = np.zeros(n, dtype=np.float32)
+            matched = np.zeros(n, dtype=np.int32)
+            for term in terms:
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                docs = np.frombuffer(posting[0], dtype=np.uint32)
+                tfs = np.frombuffer(posting[1], dtype=np.uint16).astype(np.float32)
+                scores[docs] += self.idf(term) * tfs * (self.k1 + 1) / (tfs + norms[docs])
+                matched[docs] += 1
+
+            candidates = np.flatnonzero(matched)
+            if since_ts is not None:
+                timestamps = np.frombuffer(self._timestamps, dtype=np.int64)
+                candidates = candidates[timestamps[candidates] > since_ts]
+            if len(candidates) > k:
+                top = np.argpartition(-scores[candidates], k - 1)[:k]
+                candidates = candidates[top]
+            order = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [LexicalHit(self._ids[i], float(scores[i]), int(matched[i])) for i in order]
+
+    def prune(self, before_ts: int) -> int:
+        """Removes documents with a timestamp before `before_ts`. Returns how many were removed."""
+        import numpy as np
+
+        with self._lock:
+            self._last_prune = time.time()
+            n = len(self._ids)
+            if not n:
+                return 0
+            keep = np.frombuffer(self._timestamps, dtype=np.int64) >= before_ts
+            removed = n - int(keep.sum())
+            if not removed:
+                return 0
+
+            renumber = np.full(n, -1, dtype=np.int64)
+            renumber[keep] = np.arange(n - removed)
+            for term, (docs, tfs) in list(self._postings.items()):
+                doc_numbers = np.frombuffer(docs, dtype=np.uint32)
+                kept = keep[doc_numbers]
+                if not kept.any():
+                    del self._postings[term]
+                elif not kept.all():
+                    self._postings[term] = (
+                        array("I", renumber[doc_numbers[kept]].astype(np.uint32).tobytes()),
+                        array("H", np.frombuffer(tfs, dtype=np.uint16)[kept].tobytes()),
+                    )
+                else:
+                    self._postings[term] = (array("I", renumber[doc_numbers].astype(np.uint32).tobytes()), tfs)
+
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32)[keep]
+            self._lengths = array("I", lengths.tobytes())
+            self._timestamps = array("q", np.frombuffer(self._timestamps, dtype=np.int64)[keep].tobytes())
+            self._ids = [doc_id for doc_id, kept in zip(self._ids, keep.tolist()) if kept]
+            self._numbers = {doc_id: number for number, doc_id in enumerate(self._ids)}
+            self._total_length = int(lengths.sum())
+            return removed
@@ -0,0 +1,115 @@
+# llm_cache.py
+"""
+A local SQLite cache for LLM responses, with exact and semantic lookup.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Optional
+import telemetry
+
+def normalize_prompt(text: str) -> str:
+    """Lower-cases, collapses whitespace and strips trailing punctuation so trivial edits still hit."""
+    return re.sub(r"\s+", " ", text).strip().lower().rstrip("?!. ")
+
+def fingerprint(*parts) -> str:
+    """A stable hash of JSON-serializable parts, used for cache keys and context fingerprints."""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def llm_params(llm) -> Dict:
+    """The model parameters that change an LLM's output, for inclusion in cache keys."""
+    return {
+        "model": getattr(llm, "model", None) or getattr(llm, "model_name", None) or type(llm).__name__,
+        "temperature": getattr(llm, "temperature", None),
+    }
+
+def _cosine_distance(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return 1.0 - dot / norm if norm else 1.0
+
+class ResponseCache:
+    """
+    Stores LLM responses by namespace ('plan', 'report', ...) and key.
+
+    Exact lookups match a fingerprint of the normalized prompt and model
+    parameters. Entries written with an embedding can also be found by
+    semantic lookup: the nearest unexpired entry with the same parameters
+    whose cosine distance is within a threshold. Every entry has a TTL.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, params TEXT NOT NULL, value TEXT NOT NULL, "
+            "embedding BLOB, expires REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(lambda: {"exact": 0, "semantic": 0, "miss": 0})
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        """Returns the unexpired value stored under `key`, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE namespace = ? AND key = ? AND expires > ?",
+                (namespace, key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_similar(self, namespace: str, params: str, embedding: List[float],
+                    max_distance: float) -> Optional[str]:
+        """Returns the closest unexpired value for the same `params` within `max_distance`."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value, embedding FROM responses "
+                "WHERE namespace = ? AND params = ? AND embedding IS NOT NULL AND expires > ?",
+                (namespace, params, time.time()),
+            ).fetchall()
+        best, best_distance = None, max_distance
+        for value, blob in rows:
+            distance = _cosine_distance(embedding, array("f", blob))
+            if distance <= best_distance:
+                best, best_distance = value, distance
+        return best
+
+    def put(self, namespace: str, key: str, params: str, value: str, ttl: float,
+            embedding: Optional[List[float]] = None) -> None:
+        """Stores `value` for `ttl` seconds, pruning expired entries in the same namespace."""
+        blob = array("f", embedding).tobytes() if embedding is not None else None
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE namespace = ? AND expires <= ?", (namespace, now))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (namespace, key, params, value, embedding, expires) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, params, value, blob, now + ttl),
+            )
+            self._conn.commit()
+
+    def record(self, namespace: str, outcome: str) -> None:
+        """Counts a lookup outcome: 'exact', 'semantic' or 'miss'."""
+        self._counters[namespace][outcome] += 1
+        telemetry.increment("llm_cache_lookups_total", namespace=namespace, outcome=outcome)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Returns per-namespace hit counts and hit rate."""
+        report = {}
+        for namespace, counts in self._counters.items():
+            total = sum(counts.values())
+            hits = counts["exact"] + counts["semantic"]
+            report[namespace] = {**counts, "hit_rate": hits / total if total else 0.0}
+        return report
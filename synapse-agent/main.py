@@ -1,46 +1,147 @@
 # main.py
+import argparse
 import os
+import threading
 from dotenv import load_dotenv
+import config
+from checkpoints import CheckpointStore, new_thread_id, run_config as checkpoint_config
 from graph import create_agent_graph, AgentState
+from streaming import stream_events
+
+def print_event(event):
+    """Prints a streaming event in the REPL."""
+    if event["type"] == "token":
+        print(event["text"], end="", flush=True)
+        return
+    if event["type"] == "report":
+        if not event["streamed"]:
+            print(event["text"])
+        print()
+        return
+
+    detail = event["detail"]
+    if event["node"] == "ResearchManager" and "research_plan" in detail:
+        plan = detail["research_plan"]
+        print(f"\n[Plan] queries: {plan.get('search_queries', [])} | tickers: {plan.get('stock_tickers', [])}")
+    elif event["node"] == "SearchSpecialist":
+        skipped = sum(1 for d in detail.get("search_decisions", []) if d["action"] == "skipped")
+        print(f"\n[Search] ingested {detail.get('ingested_documents', 0)} new documents"
+              f" ({skipped} queries served from the local store)")
+    elif event["node"] == "MarketDataSpecialist":
+        print(f"\n[Market data] {detail.get('stock_context', '').strip()}")
+    elif event["node"] == "FinancialAnalyst":
+        sources = detail.get("retrieved_sources", [])
+        tokens = f", prompt ≈ {detail['prompt_tokens']} tokens" if "prompt_tokens" in detail else ""
+        print(f"\n[Sources] {len(sources)} documents retrieved{tokens}")
+        for src in sources:
+            print(f"  - {src.get('source')} ({src.get('date')}): {src.get('url')}")
+
+def run_graph(app, initial_state, run_config, stream: bool = True):
+    """Runs (or, with initial_state None, resumes) the graph and prints its progress and report."""
+    if not stream:
+        # This is a more reliable way to run the graph and get the final state
+        final_state = app.invoke(initial_state, run_config)
+
+        # The final report is now directly accessible in the output
+        report = final_state.get('final_report', 'No report was generated.')
+        print("\nFinal Report:\n")
+        print(report)
+        return
+
+    # Print progress as each agent finishes, then the report as it is written.
+    report_started = False
+    for event in stream_events(app, initial_state, run_config):
+        if event["type"] in ("token", "report") and not report_started:
+            report_started = True
+            print("\nFinal Report:\n")
+        print_event(event)
 
 def main():
     """
     Main entry point for the Multi-Agent Financial Analyst.
     """
+    parser = argparse.ArgumentParser(description="Multi-Agent Financial Analyst REPL.")
+    parser.add_argument("--no-stream", action="store_true",
+                        help="Wait for the full report instead of streaming progress and tokens.")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="Resume a failed or interrupted run from its last completed step, then continue.")
+    args = parser.parse_args()
+
     load_dotenv()
     if not os.getenv("GOOGLE_API_KEY") or not os.getenv("TAVILY_API_KEY"):
         print("ERROR: Please set GOOGLE_API_KEY and TAVILY_API_KEY in your .env file.")
         return
 
     print("Initializing Multi-Agent Financial Team...")
-    app = create_agent_graph()
+    # Each step's state is checkpointed, so a failed run can be resumed
+    # without repeating the LLM and search calls that already succeeded.
+    store = None
+    if config.CHECKPOINT_ENABLED:
+        store = CheckpointStore(config.CHECKPOINT_PATH, keep_completed=config.CHECKPOINT_KEEP_COMPLETED)
+        store.prune(config.CHECKPOINT_RETENTION)
+    app = create_agent_graph(checkpointer=store.saver if store else None)
+    # Load the models in the background while the user types the first question.
+    threading.Thread(target=config.warm_up, daemon=True).start()
     print("Agent Team Ready. Ask a financial or policy question.")
     print("Type 'exit' or 'quit' to end.")
+    unfinished = store.resumable() if store else []
+    if unfinished:
+        print(f"{len(unfinished)} unfinished run(s) saved; type 'resume' for the latest or 'resume <id>'.")
 
+    pending_input = [f"resume {args.resume}"] if args.resume else []
     while True:
+        thread_id = None
         try:
-            question = input("\n➜  ")
+            question = pending_input.pop(0) if pending_input else input("\n➜  ")
             if question.lower() in ["exit", "quit"]:
                 break
             
             if not question.strip():
                 continue
 
-            initial_state = {"original_query": question}
-            
-            # This is a more reliable way to run the graph and get the final state
-            final_state = app.invoke(initial_state, {"recursion_limit": 25})
+            words = question.split()
+            if words[0].lower() == "resume" and len(words) <= 2:
+                if store is None:
+                    print("Checkpointing is off (CHECKPOINT_ENABLED=false); nothing to resume.")
+                    continue
+                run = store.get(words[1]) if len(words) == 2 else next(iter(store.resumable(1)), None)
+                if run is None:
+                    print("No saved run to resume.")
+                    continue
+                thread_id, query, initial_state = run["thread_id"], run["query"], None
+                remaining = app.get_state(checkpoint_config(thread_id)).next
+                if not remaining:
+                    print(f"Run {thread_id} has already finished.")
+                    store.complete(thread_id)
+                    continue
+                print(f"Resuming run {thread_id} ({query!r}) at {', '.join(remaining)}")
+            else:
+                thread_id, query, initial_state = new_thread_id(), question, {"original_query": question}
 
-            # The final report is now directly accessible in the output
-            report = final_state.get('final_report', 'No report was generated.')
-            print("\nFinal Report:\n")
-            print(report)
+            if store:
+                store.start(thread_id, query)
+                run_config = checkpoint_config(thread_id)
+            else:
+                run_config = {"recursion_limit": 25}
+
+            run_graph(app, initial_state, run_config, stream=not args.no_stream)
+            if store:
+                store.complete(thread_id)
 
         except (KeyboardInterrupt):
+            if store and thread_id:
+                store.fail(thread_id, "interrupted")
+                print(f"\nRun {thread_id} interrupted; resume it with: python main.py --resume {thread_id}")
             print("\nExiting...")
             break
         except Exception as e:
             print(f"\nAn error occurred: {e}")
+            if store and thread_id:
+                store.fail(thread_id, str(e))
+                print(f"Completed steps were saved; type 'resume {thread_id}' to retry from where it stopped.")
+
+    if config.LLM_CACHE_ENABLED:
+        print(f"LLM response cache: {config.LLM_CACHE.stats()}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,157 @@
+# prompt_context.py
+"""
+Builds the news context for the analyst's prompt within a token budget.
+
+Retrieved snippets (already de-duplicated by retrieve_documents) are ranked
+by retrieval relevance and recency, trimmed to fit the budget and rendered with each source and URL
+written once rather than repeated on every snippet.
+"""
+import math
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from langchain_core.documents import Document
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+# Snippets cut shorter than this say too little to be worth their metadata.
+_MIN_SNIPPET_TOKENS = 25
+
+def estimate_tokens(text: str) -> int:
+    """
+    A fast local estimate of the model's token count: roughly one token per
+    four characters of each word, plus one per punctuation mark.
+    """
+    return sum((len(piece) + 3) // 4 if piece[0].isalnum() or piece[0] == "_" else 1
+               for piece in _PIECE_RE.findall(text))
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cuts text to about `max_tokens`, preferring to end on a sentence boundary."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], 0
+    for sentence in _SENTENCE_END_RE.split(text):
+        cost = estimate_tokens(sentence)
+        if used + cost > max_tokens:
+            break
+        kept.append(sentence)
+        used += cost
+    if kept:
+        return " ".join(kept) + " …"
+    # A single sentence longer than the budget: cut it by words.
+    words = text.split()
+    out, used = [], 0
+    for word in words:
+        cost = estimate_tokens(word)
+        if used + cost > max_tokens:
+            break
+        out.append(word)
+        used += cost
+    return " ".join(out) + " …"
+
+def fit_blocks(text: str, max_tokens: int, separator: str = "\n\n") -> str:
+    """
+    Keeps whole blocks (e.g. one per ticker) from the start of `text` while
+    they fit in `max_tokens`. A first block that alone is too long is
+    truncated rather than dropped.
+    """
+    kept, used = [], 0
+    for block in text.split(separator):
+        cost = estimate_tokens(block)
+        if used + cost > max_tokens:
+            if not kept and max_tokens > 0:
+                kept.append(truncate_to_tokens(block, max_tokens))
+            break
+        kept.append(block)
+        used += cost
+    return separator.join(kept)
+
+class AssembledContext(NamedTuple):
+    """The rendered context, the documents it includes and counts for tracking the savings."""
+    text: str
+    documents: List[Document]
+    stats: Dict[str, int]
+
+def _rank(docs: Sequence[Document], recency_weight: float, half_life_days: float,
+          now: float) -> List[Document]:
+    """Orders documents by a blend of retrieval rank (they arrive best first) and age."""
+    n = len(docs)
+    scored = []
+    for position, doc in enumerate(docs):
+        relevance = 1.0 - position / n
+        age_days = max(0.0, (now - doc.metadata.get("timestamp", now)) / 86400)
+        recency = math.exp(-math.log(2) * age_days / half_life_days) if half_life_days > 0 else 1.0
+        scored.append(((1 - recency_weight) * relevance + recency_weight * recency, -position, doc))
+    scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+    return [doc for _, _, doc in scored]
+
+def _render(selected: List[tuple]) -> str:
+    """
+    Renders (document, text) pairs grouped by source. Each URL gets one
+    reference number, shown with its date once; further snippets from the
+    same article reuse the number.
+    """
+    groups: Dict[str, List[tuple]] = {}
+    for doc, text in selected:
+        groups.setdefault(doc.metadata.get("source", "N/A"), []).append((doc, text))
+
+    refs: Dict[str, int] = {}
+    blocks = []
+    for source, items in groups.items():
+        lines = [f"Source: {source}"]
+        for doc, text in items:
+            url = doc.metadata.get("url", "N/A")
+            if url in refs:
+                lines.append(f"[{refs[url]}] {text}")
+            else:
+                refs[url] = len(refs) + 1
+                lines.append(f"[{refs[url]}] ({doc.metadata.get('date', 'N/A')}, {url}) {text}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+def assemble_context(docs: Sequence[Document], budget_tokens: int, max_snippet_tokens: int = 350,
+                     recency_weight: float = 0.3, half_life_days: float = 7.0,
+                     now: Optional[float] = None) -> AssembledContext:
+    """
+    Fits retrieved documents into `budget_tokens` of prompt context.
+
+    Documents are ranked by relevance and recency, each is capped at
+    `max_snippet_tokens`, and snippets are added best first while they fit;
+    a snippet may be shortened to use up what remains of the budget.
+    Near-duplicates are expected to have been dropped by retrieval.
+    """
+    now = time.time() if now is None else now
+    raw_tokens = sum(estimate_tokens(doc.page_content) for doc in docs)
+
+    selected, used = [], 0
+    urls, sources = set(), set()
+    for doc in _rank(docs, recency_weight, half_life_days, now) if docs else []:
+        url, source = doc.metadata.get("url", "N/A"), doc.metadata.get("source", "N/A")
+        # The reference number, plus the metadata the first time a URL or source appears.
+        overhead = 3
+        if url not in urls:
+            overhead += estimate_tokens(f"({doc.metadata.get('date', 'N/A')}, {url})")
+        if source not in sources:
+            overhead += estimate_tokens(f"Source: {source}")
+        room = min(max_snippet_tokens, budget_tokens - used - overhead)
+        if room < _MIN_SNIPPET_TOKENS:
+            continue
+        text = truncate_to_tokens(" ".join(doc.page_content.split()), room)
+        if not text.strip(" …"):
+            continue
+        selected.append((doc, text))
+        used += estimate_tokens(text) + overhead
+        urls.add(url)
+        sources.add(source)
+
+    rendered = _render(selected)
+    return AssembledContext(
+        text=rendered,
+        documents=[doc for doc, _ in selected],
+        stats={
+            "candidates": len(docs),
+            "used": len(selected),
+            "raw_tokens": raw_tokens,
+            "context_tokens": estimate_tokens(rendered),
+        },
+    )
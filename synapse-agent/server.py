@@ -0,0 +1,198 @@
+# server.py
+"""
+HTTP API server that runs research queries concurrently.
+
+One compiled graph and one set of shared services (embedding model, Chroma
+client, LLM client) serve every request. Admission is bounded: at most
+SERVER_MAX_CONCURRENCY graphs run at once, up to SERVER_MAX_QUEUE more wait,
+and anything beyond that is rejected with 503 so callers can back off.
+
+The concurrency limit bounds requests, not threads: when a request times
+out, its slot is freed, but a synchronous node that is mid-call (an LLM
+request, a search) keeps running in its worker thread until that call
+returns. Under repeated timeouts, real work can briefly exceed the limit.
+
+    uvicorn server:app --host 0.0.0.0 --port 8000
+    # or: python server.py --port 8000
+"""
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+import config
+import telemetry
+from graph import create_agent_graph
+from streaming import astream_events
+from tools.transport import TRANSPORT
+
+class ResearchRequest(BaseModel):
+    """Request body for a research query."""
+    query: str = Field(..., min_length=1, description="The financial or policy question to research.")
+    stream: bool = Field(True, description="Stream progress and report tokens as NDJSON events.")
+
+class TelemetrySwitch(BaseModel):
+    """Request body for turning telemetry on or off at runtime."""
+    enabled: bool
+
+class AdmissionControl:
+    """
+    Bounds in-flight work: `max_concurrency` runs at once and at most
+    `max_queue` more may wait for a slot. Callers over the limit are
+    rejected immediately instead of queueing without bound.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.capacity = max_concurrency + max_queue
+        self.pending = 0
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    def try_admit(self) -> bool:
+        """Reserves a place in line; returns False when the server is full."""
+        if self.pending >= self.capacity:
+            return False
+        self.pending += 1
+        return True
+
+    def release(self) -> None:
+        """Frees a place reserved by try_admit(); call exactly once per admitted request."""
+        self.pending -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """Waits for a run slot for an admitted request."""
+        async with self._slots:
+            yield
+
+class AdmittedStream(StreamingResponse):
+    """
+    A streaming response that frees its admission place when it ends,
+    however it ends. A generator closed before its first iteration (the
+    client disconnected before the body started) never runs its own cleanup,
+    so the release cannot live inside the body.
+    """
+
+    def __init__(self, content, admission: AdmissionControl, **kwargs):
+        super().__init__(content, **kwargs)
+        self.admission = admission
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.admission.release()
+
+_graph = None
+_admission: Optional[AdmissionControl] = None
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    global _graph, _admission
+    load_dotenv()
+    _graph = create_agent_graph()
+    _admission = AdmissionControl(config.SERVER_MAX_CONCURRENCY, config.SERVER_MAX_QUEUE)
+    # Load the shared models once, up front, rather than on the first request.
+    await asyncio.to_thread(config.warm_up)
+    yield
+
+app = FastAPI(title="Synapse Research API", lifespan=lifespan)
+
+async def _timed_events(query: str) -> AsyncIterator[Dict]:
+    """
+    Runs one query and yields its events, enforcing the per-request timeout.
+    On timeout the graph run is cancelled, but a synchronous node already
+    running in a worker thread finishes its current call in the background.
+    """
+    deadline = time.monotonic() + config.SERVER_REQUEST_TIMEOUT
+    events = astream_events(_graph, {"original_query": query}, {"recursion_limit": 25})
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            try:
+                yield await asyncio.wait_for(events.__anext__(), timeout=remaining)
+            except StopAsyncIteration:
+                return
+    finally:
+        await events.aclose()
+
+def _reject():
+    raise HTTPException(status_code=503, detail="Server is at capacity; retry later.",
+                        headers={"Retry-After": "1"})
+
+@app.post("/research")
+async def research(request: ResearchRequest):
+    """
+    Runs a research query. With `stream` set, responds with NDJSON events
+    (node progress, report tokens, then the final report); otherwise with
+    one JSON object once the report is complete.
+    """
+    if not _admission.try_admit():
+        _reject()
+
+    if request.stream:
+        async def body():
+            start = time.monotonic()
+            async with _admission.slot():
+                try:
+                    async for event in _timed_events(request.query):
+                        yield json.dumps(event, default=str) + "\n"
+                except asyncio.TimeoutError:
+                    yield json.dumps({"type": "error", "error": "Request timed out."}) + "\n"
+                except Exception as e:
+                    yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+            yield json.dumps({"type": "done", "elapsed": round(time.monotonic() - start, 3)}) + "\n"
+
+        return AdmittedStream(body(), _admission, media_type="application/x-ndjson")
+
+    start = time.monotonic()
+    result: Dict = {"query": request.query, "progress": []}
+    try:
+        async with _admission.slot():
+            async for event in _timed_events(request.query):
+                if event["type"] == "node":
+                    result["progress"].append(event)
+                elif event["type"] == "report":
+                    result["report"] = event["text"]
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Request timed out.")
+    finally:
+        _admission.release()
+    result["elapsed"] = round(time.monotonic() - start, 3)
+    return result
+
+@app.get("/health")
+async def health():
+    """Liveness plus current load and outbound source health, for dashboards and load balancers."""
+    return {
+        "status": "ok",
+        "pending": _admission.pending if _admission else 0,
+        "capacity": _admission.capacity if _admission else 0,
+        "sources": TRANSPORT.stats(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Span latencies, token and document counts and cache hits in Prometheus text format."""
+    return PlainTextResponse(telemetry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.post("/telemetry")
+async def set_telemetry(switch: TelemetrySwitch):
+    """Turns span recording on or off without restarting the server."""
+    telemetry.set_enabled(switch.enabled)
+    return {"enabled": telemetry.enabled()}
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the research API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
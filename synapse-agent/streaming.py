@@ -0,0 +1,85 @@
+# streaming.py
+"""
+Turns a compiled agent graph run into a stream of progress and report-token events.
+"""
+from typing import AsyncIterator, Dict, Iterator, List
+
+# The state fields worth surfacing as progress when each agent finishes.
+NODE_EVENT_FIELDS = {
+    "ResearchManager": ["research_plan"],
+    "SearchSpecialist": ["ingested_documents", "search_summary", "search_decisions"],
+    "MarketDataSpecialist": ["stock_context"],
+    "FinancialAnalyst": ["retrieved_sources", "prompt_tokens", "context_stats"],
+}
+
+# Only the report call is streamed; the planner's structured output is not prose.
+REPORT_NODE = "FinancialAnalyst"
+
+def _message_text(content) -> str:
+    """Extracts plain text from a message chunk's content (a string or a list of parts)."""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part.get("text", "") if isinstance(part, dict) else str(part) for part in content
+    )
+
+def node_event(node: str, update: Dict) -> Dict:
+    """Builds a progress event from the state update a node returned."""
+    fields = NODE_EVENT_FIELDS.get(node, [])
+    return {
+        "type": "node",
+        "node": node,
+        "detail": {field: update[field] for field in fields if field in (update or {})},
+    }
+
+class _EventBuilder:
+    """Converts raw (mode, chunk) items from a graph stream into events."""
+
+    def __init__(self):
+        self.final_report = None
+        self.streamed = False
+
+    def handle(self, mode: str, chunk) -> List[Dict]:
+        if mode == "messages":
+            message, metadata = chunk
+            if metadata.get("langgraph_node") != REPORT_NODE:
+                return []
+            text = _message_text(message.content)
+            if not text:
+                return []
+            self.streamed = True
+            return [{"type": "token", "text": text}]
+
+        events = []
+        for node, update in chunk.items():
+            events.append(node_event(node, update))
+            if update and update.get("final_report"):
+                self.final_report = update["final_report"]
+        return events
+
+    def finish(self) -> Dict:
+        return {"type": "report", "text": self.final_report or "No report was generated.",
+                "streamed": self.streamed}
+
+STREAM_MODES = ["updates", "messages"]
+
+def stream_events(app, initial_state: Dict, run_config: Dict) -> Iterator[Dict]:
+    """
+    Runs the graph and yields events as they happen:
+
+    - {"type": "node", "node": ..., "detail": {...}} when an agent finishes,
+    - {"type": "token", "text": ...} for each streamed report token,
+    - {"type": "report", "text": ..., "streamed": bool} once, at the end.
+    """
+    builder = _EventBuilder()
+    for mode, chunk in app.stream(initial_state, run_config, stream_mode=STREAM_MODES):
+        yield from builder.handle(mode, chunk)
+    yield builder.finish()
+
+async def astream_events(app, initial_state: Dict, run_config: Dict) -> AsyncIterator[Dict]:
+    """The asynchronous counterpart of stream_events, for use inside an event loop."""
+    builder = _EventBuilder()
+    async for mode, chunk in app.astream(initial_state, run_config, stream_mode=STREAM_MODES):
+        for event in builder.handle(mode, chunk):
+            yield event
+    yield builder.finish()
@@ -0,0 +1,264 @@
+# telemetry.py
+"""
+Lightweight spans and metrics for graph nodes, tools, embedding batches,
+vector queries and LLM calls.
+
+A span times one operation and carries attributes such as document or token
+counts. Finished spans are written as JSON lines (TELEMETRY_LOG_PATH) and
+aggregated into Prometheus text-format metrics, served by the API server at
+/metrics or written to TELEMETRY_METRICS_PATH. Telemetry can be switched on
+and off at runtime with set_enabled(); while it is off, span() returns a
+shared no-op object, so instrumented code pays for one flag check.
+
+    with telemetry.span("llm", "report") as span:
+        report = chain.invoke(inputs)
+        span.set(prompt_tokens=..., completion_tokens=...)
+"""
+import atexit
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+import config
+
+# Duration histogram bucket bounds, in seconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Numeric span attributes that are summed into `synapse_<attr>_total` counters.
+COUNTED_ATTRS = ("documents", "stored", "prompt_tokens", "completion_tokens", "cache_hits", "cache_misses")
+
+_enabled = config.TELEMETRY_ENABLED
+_current: contextvars.ContextVar = contextvars.ContextVar("telemetry_span", default=None)
+_lock = threading.Lock()
+_spans: Dict[Tuple[str, str], Dict] = {}
+_counters: Dict[Tuple[str, Tuple], float] = {}
+_log_file = None
+_writer_started = False
+
+def enabled() -> bool:
+    return _enabled
+
+def set_enabled(flag: bool) -> None:
+    """Turns span recording and metric aggregation on or off for this process."""
+    global _enabled
+    _enabled = bool(flag)
+
+def reset() -> None:
+    """Clears the aggregated metrics."""
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+class Span:
+    """One timed operation. Use as a context manager; attach attributes with set()."""
+    __slots__ = ("kind", "name", "attrs", "trace_id", "span_id", "parent_id", "_start", "_token")
+
+    def __init__(self, kind: str, name: str, attrs: Dict):
+        self.kind = kind
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs) -> "Span":
+        self.attrs.update(attrs)
+        return self
+
+    def __enter__(self) -> "Span":
+        parent = _current.get()
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.span_id = uuid.uuid4().hex[:16]
+        self._token = _current.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        duration = time.perf_counter() - self._start
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            pass  # Exited in a different context than it was entered (e.g. a generator).
+        if exc_type is not None:
+            self.attrs["error"] = str(exc) or exc_type.__name__
+        _finish(self, duration, error=exc_type is not None)
+        return False
+
+class _NoopSpan:
+    """Stands in for Span while telemetry is off."""
+    __slots__ = ()
+
+    def set(self, **attrs) -> "_NoopSpan":
+        return self
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+_NOOP = _NoopSpan()
+
+def span(kind: str, name: str, **attrs):
+    """
+    Times an operation of `kind` ('node', 'tool', 'embedding', 'vector',
+    'llm', 'ingest') named `name`. Spans opened inside another span in the
+    same context become its children.
+    """
+    if not _enabled:
+        return _NOOP
+    return Span(kind, name, attrs)
+
+def traced(kind: str, name: Optional[str] = None):
+    """Decorator form of span(); the span is named after the function unless `name` is given."""
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(kind, label, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def increment(metric: str, value: float = 1, **labels) -> None:
+    """Adds `value` to the counter `synapse_<metric>` with the given labels."""
+    if not _enabled:
+        return
+    key = (metric, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def _finish(span: Span, duration: float, error: bool) -> None:
+    with _lock:
+        stats = _spans.get((span.kind, span.name))
+        if stats is None:
+            stats = _spans[(span.kind, span.name)] = {
+                "count": 0, "sum": 0.0, "errors": 0, "buckets": [0] * len(BUCKETS), "totals": {},
+            }
+        stats["count"] += 1
+        stats["sum"] += duration
+        stats["errors"] += error
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                stats["buckets"][i] += 1
+        for attr in COUNTED_ATTRS:
+            value = span.attrs.get(attr)
+            if isinstance(value, (int, float)):
+                stats["totals"][attr] = stats["totals"].get(attr, 0) + value
+
+    if config.TELEMETRY_LOG_PATH:
+        _log({
+            "ts": time.time(), "trace_id": span.trace_id, "span_id": span.span_id,
+            "parent_id": span.parent_id, "kind": span.kind, "name": span.name,
+            "duration_ms": round(duration * 1000, 3), "status": "error" if error else "ok",
+            **span.attrs,
+        })
+    if config.TELEMETRY_METRICS_PATH:
+        _start_metrics_writer()
+
+def _log(record: Dict) -> None:
+    global _log_file
+    line = json.dumps(record, default=str, ensure_ascii=False)
+    with _lock:
+        if _log_file is None:
+            path = config.TELEMETRY_LOG_PATH
+            if path == "-":
+                _log_file = sys.stderr
+            else:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                _log_file = open(path, "a", encoding="utf-8", buffering=1)
+        _log_file.write(line + "\n")
+
+def snapshot() -> Dict[str, Dict]:
+    """Aggregated span statistics keyed by 'kind:name': count, total and mean seconds, errors and totals."""
+    with _lock:
+        return {
+            f"{kind}:{name}": {
+                "count": stats["count"],
+                "seconds": stats["sum"],
+                "mean_seconds": stats["sum"] / stats["count"] if stats["count"] else 0.0,
+                "errors": stats["errors"],
+                **stats["totals"],
+            }
+            for (kind, name), stats in _spans.items()
+        }
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(pairs) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+def render_prometheus() -> str:
+    """Renders the aggregated metrics in the Prometheus text exposition format."""
+    with _lock:
+        spans = {key: {**stats, "buckets": list(stats["buckets"]), "totals": dict(stats["totals"])}
+                 for key, stats in _spans.items()}
+        counters = dict(_counters)
+
+    lines = [
+        "# HELP synapse_span_duration_seconds Duration of instrumented operations.",
+        "# TYPE synapse_span_duration_seconds histogram",
+    ]
+    for (kind, name), stats in sorted(spans.items()):
+        base = [("kind", kind), ("name", name)]
+        for bound, count in zip(BUCKETS, stats["buckets"]):
+            lines.append(f"synapse_span_duration_seconds_bucket{_labels(base + [('le', bound)])} {count}")
+        lines.append(f"synapse_span_duration_seconds_bucket{_labels(base + [('le', '+Inf')])} {stats['count']}")
+        lines.append(f"synapse_span_duration_seconds_sum{_labels(base)} {stats['sum']:.6f}")
+        lines.append(f"synapse_span_duration_seconds_count{_labels(base)} {stats['count']}")
+
+    lines += ["# HELP synapse_span_errors_total Instrumented operations that raised.",
+              "# TYPE synapse_span_errors_total counter"]
+    lines += [f"synapse_span_errors_total{_labels([('kind', kind), ('name', name)])} {stats['errors']}"
+              for (kind, name), stats in sorted(spans.items())]
+
+    for attr in COUNTED_ATTRS:
+        rows = [((kind, name), stats["totals"][attr]) for (kind, name), stats in sorted(spans.items())
+                if attr in stats["totals"]]
+        if rows:
+            lines.append(f"# TYPE synapse_{attr}_total counter")
+            lines += [f"synapse_{attr}_total{_labels([('kind', kind), ('name', name)])} {value:g}"
+                      for (kind, name), value in rows]
+
+    for metric in sorted({metric for metric, _ in counters}):
+        lines.append(f"# TYPE synapse_{metric} counter")
+        lines += [f"synapse_{metric}{_labels(labels)} {value:g}"
+                  for (name, labels), value in sorted(counters.items()) if name == metric]
+    return "\n".join(lines) + "\n"
+
+def write_metrics(path: Optional[str] = None) -> None:
+    """Writes the metrics file atomically (for node_exporter's textfile collector or similar)."""
+    path = path or config.TELEMETRY_METRICS_PATH
+    if not path:
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
+
+def _start_metrics_writer() -> None:
+    """Starts a daemon thread that rewrites the metrics file every TELEMETRY_METRICS_INTERVAL seconds."""
+    global _writer_started
+    with _lock:
+        if _writer_started:
+            return
+        _writer_started = True
+
+    def loop():
+        while True:
+            time.sleep(config.TELEMETRY_METRICS_INTERVAL)
+            write_metrics()
+
+    threading.Thread(target=loop, name="telemetry-metrics", daemon=True).start()
+    atexit.register(write_metrics)
@@ -0,0 +1,23 @@
+# tests/conftest.py
+"""
+Shared fixtures. The modules under test import each other as top-level
+modules (`import config`), so the project directory goes on sys.path.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+@pytest.fixture
+def symbols(tmp_path, monkeypatch):
+    """The bundled seed table, indexed into a temporary file and installed as config.SYMBOLS."""
+    import config
+    from tools.symbols import load_symbol_table
+
+    table = load_symbol_table(config.SYMBOLS_PATH, str(tmp_path / "symbols.idx"))
+    monkeypatch.setattr(config, "SYMBOLS", table, raising=False)
+    monkeypatch.setattr(config, "SYMBOLS_STRICT", False)
+    yield table
+    table.close()
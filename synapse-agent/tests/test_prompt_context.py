@@ -0,0 +1,15 @@
+# tests/test_prompt_context.py
+"""Fitting stock blocks into the analyst's token budget."""
+from prompt_context import estimate_tokens, fit_blocks
+
+BLOCK = ("Latest data for AAPL (2026-10-16):\nClosing Price: $182.50\nChange: $1.00 (0.55%)\n"
+         "Day's High: $183.00\nDay's Low: $180.10\nVolume: 51,234,000")
+
+def test_whole_blocks_are_kept_while_they_fit():
+    text = "\n\n".join([BLOCK, BLOCK.replace("AAPL", "MSFT")])
+    assert fit_blocks(text, estimate_tokens(BLOCK) + 1) == BLOCK
+
+def test_an_oversized_first_block_is_truncated_not_dropped():
+    fitted = fit_blocks(BLOCK, estimate_tokens(BLOCK) // 2)
+    assert fitted.startswith("Latest data for AAPL")
+    assert estimate_tokens(fitted) <= estimate_tokens(BLOCK) // 2 + 1
@@ -0,0 +1,40 @@
+# tests/test_symbols.py
+"""Ticker validation against the seed symbol table."""
+import pytest
+from tools.symbols import unresolved_names, validate_tickers
+
+@pytest.mark.parametrize("query, tickers", [
+    ("How is Roku doing after the earnings call?", ["ROKU"]),
+    ("What is the outlook for Etsy and Pinterest?", ["ETSY", "PINS"]),
+    ("Is IT spending up at Accenture?", ["ACN"]),
+])
+def test_named_but_unlisted_companies_are_kept(symbols, query, tickers):
+    assert validate_tickers(tickers, query=query) == (tickers, [])
+
+def test_listed_and_unlisted_companies_together(symbols):
+    valid, rejected = validate_tickers(["LCID", "TSLA"], query="Compare Lucid Motors with Tesla")
+    assert valid == ["LCID", "TSLA"] and rejected == []
+
+def test_cashtags_are_normalized(symbols):
+    assert validate_tickers(["$msft"]) == (["MSFT"], [])
+    assert validate_tickers(["$ROKU"], query="Is $ROKU a buy?") == (["ROKU"], [])
+
+def test_ticker_written_in_the_query_is_kept(symbols):
+    assert validate_tickers(["FAKEX"], query="How is FAKEX doing?") == (["FAKEX"], [])
+
+def test_invented_ticker_with_nothing_to_stand_for_is_dropped(symbols):
+    valid, rejected = validate_tickers(["AAPL", "FAKEX"], query="How are rising rates affecting AAPL?")
+    assert valid == ["AAPL"] and rejected == ["FAKEX"]
+
+def test_without_a_query_unlisted_tickers_pass_unverified(symbols):
+    assert validate_tickers(["FAKEX"]) == (["FAKEX"], [])
+
+def test_strict_mode_rejects_every_unlisted_ticker(symbols):
+    assert validate_tickers(["ROKU", "AAPL"], strict=True, query="Roku vs Apple") == (["AAPL"], ["ROKU"])
+
+def test_names_and_malformed_tickers(symbols):
+    assert validate_tickers(["Google", "brk.b", "not a ticker"]) == (["GOOGL", "BRK-B"], ["not a ticker"])
+
+def test_unresolved_names_skip_question_words_and_known_companies(symbols):
+    assert unresolved_names("What is the outlook for Roku and Apple?") == ["roku"]
+    assert unresolved_names("How is AAPL doing?") == []
@@ -0,0 +1,192 @@
+# tests/test_transport.py
+"""Retries, Retry-After, circuit breaking and per-host slots in the shared transport."""
+import socket
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from tools import transport
+from tools.transport import SourceUnavailable, Transport, TransientError
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        script = self.server.scripts.get(self.path, [(200, {})])
+        self.server.hits[self.path] = self.server.hits.get(self.path, 0) + 1
+        # The last scripted response repeats once the others are used up.
+        status, headers = script.pop(0) if len(script) > 1 else script[0]
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    """A local HTTP server answering each path from a scripted list of (status, headers)."""
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.scripts, srv.hits = {}, {}
+    srv.url = f"http://127.0.0.1:{srv.server_port}"
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records backoff delays instead of sleeping."""
+    delays = []
+    monkeypatch.setattr(transport, "time", types.SimpleNamespace(sleep=delays.append, monotonic=time.monotonic))
+    return delays
+
+def make_transport(**overrides) -> Transport:
+    settings = dict(pool_size=4, per_host_limit=1, retries=2, backoff_base=0.01, backoff_max=8.0,
+                    failure_threshold=10, cooldown=30.0)
+    settings.update(overrides)
+    return Transport(**settings)
+
+def slot_free(t: Transport, url: str) -> bool:
+    limit = t._host_limit(url.split("//", 1)[1])
+    if not limit.acquire(blocking=False):
+        return False
+    limit.release()
+    return True
+
+def test_503_is_retried_up_to_retries(server, sleeps):
+    server.scripts["/down"] = [(503, {})]
+    t = make_transport(retries=2)
+    assert t.get(server.url + "/down", source="down").status_code == 503
+    assert server.hits["/down"] == 3
+    assert t.stats()["down"]["retries"] == 2
+    assert slot_free(t, server.url)
+
+def test_retry_succeeds_after_a_transient_status(server, sleeps):
+    server.scripts["/flaky"] = [(502, {}), (200, {})]
+    t = make_transport()
+    assert t.get(server.url + "/flaky").status_code == 200
+    assert server.hits["/flaky"] == 2
+
+def test_retry_after_is_honoured(server, sleeps):
+    server.scripts["/limited"] = [(429, {"Retry-After": "3"}), (200, {})]
+    t = make_transport(backoff_base=0.001)
+    assert t.get(server.url + "/limited").status_code == 200
+    assert sleeps == [3.0]
+
+def test_breaker_opens_at_threshold_and_reraises_the_original_error(sleeps):
+    t = make_transport(retries=5, failure_threshold=2)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise requests.ConnectionError("refused")
+
+    with pytest.raises(requests.ConnectionError):
+        t.call("api", failing)
+    assert len(calls) == 2
+    assert t.stats()["api"]["state"] == "open"
+    with pytest.raises(SourceUnavailable):
+        t.call("api", failing)
+    assert len(calls) == 2
+
+@pytest.mark.parametrize("probe_ok, state", [(True, "closed"), (False, "open")])
+def test_half_open_probe_closes_or_reopens_the_breaker(sleeps, probe_ok, state):
+    t = make_transport(retries=3, failure_threshold=1, cooldown=0.05)
+    with pytest.raises(requests.Timeout):
+        t.call("api", lambda: (_ for _ in ()).throw(requests.Timeout("slow")))
+    assert not t.available("api")
+    time.sleep(0.06)
+    assert t.available("api")
+
+    calls = []
+
+    def probe():
+        calls.append(1)
+        if not probe_ok:
+            raise requests.Timeout("still slow")
+        return "ok"
+
+    if probe_ok:
+        assert t.call("api", probe) == "ok"
+    else:
+        with pytest.raises(requests.Timeout):
+            t.call("api", probe)
+    assert len(calls) == 1  # a probe is never retried
+    assert t.stats()["api"]["state"] == state
+
+def test_source_is_unavailable_while_a_probe_is_in_flight():
+    t = make_transport(failure_threshold=1, cooldown=0.0)
+    health = t.health("api")
+    health.record(False, 0.1)
+    assert health.acquire()
+    assert health.state == "half_open"
+    assert not t.available("api")
+    assert not health.acquire()
+
+def test_transient_error_is_retried(sleeps):
+    t = make_transport(retries=2)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise TransientError("empty result")
+        return "data"
+
+    assert t.call("sdk", flaky) == "data"
+    assert len(attempts) == 3
+
+def test_non_retryable_errors_are_not_retried(sleeps):
+    t = make_transport(retries=3)
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        t.call("sdk", broken)
+    assert len(attempts) == 1
+
+def test_host_slot_is_released_on_every_path(server, sleeps):
+    server.scripts["/down"] = [(503, {})]
+    t = make_transport(retries=1)
+
+    t.get(server.url + "/ok")
+    assert slot_free(t, server.url)
+
+    t.get(server.url + "/down")
+    assert slot_free(t, server.url)
+
+    with pytest.raises(RuntimeError):
+        with t.open("GET", server.url + "/ok"):
+            raise RuntimeError("caller failed while reading")
+    assert slot_free(t, server.url)
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        closed_url = f"http://127.0.0.1:{s.getsockname()[1]}"
+    with pytest.raises(requests.ConnectionError):
+        t.get(closed_url + "/gone")
+    assert slot_free(t, closed_url)
+
+    open_breaker = t.health("127.0.0.1:1")
+    open_breaker.failure_threshold = 1
+    open_breaker.record(False, 0.0)
+    with pytest.raises(SourceUnavailable):
+        t.get("http://127.0.0.1:1/x")
+    assert slot_free(t, "http://127.0.0.1:1")
+
+def test_slot_is_free_for_other_requests_during_backoff(server):
+    server.scripts["/limited"] = [(503, {"Retry-After": "0.5"}), (200, {})]
+    t = make_transport(retries=1, backoff_max=0.5)
+    worker = threading.Thread(target=t.get, args=(server.url + "/limited",))
+    worker.start()
+    time.sleep(0.2)
+    start = time.monotonic()
+    assert t.get(server.url + "/ok").status_code == 200
+    assert time.monotonic() - start < 0.3
+    worker.join()
@@ -0,0 +1,150 @@
+# tools/articles.py
+"""
+Concurrent full-article ingestion: fetch article pages, extract the main
+text, split it into overlapping chunks and stream the chunks into batched
+embedding and storage.
+"""
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+import config
+import telemetry
+from tools.common import IngestItem, upsert_documents
+from tools.transport import TRANSPORT
+
+# An article to ingest: (url, title, date, source). The title is stored on
+# its own when the page cannot be fetched, so nothing is lost on failure.
+ArticleRef = Tuple[str, str, object, str]
+
+# Tags that never hold article body text.
+_BOILERPLATE_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "iframe", "svg"]
+# Paragraphs shorter than this are usually captions, bylines or buttons.
+_MIN_PARAGRAPH_CHARS = 40
+
+class ArticleIngestResult(NamedTuple):
+    """Outcome of an article ingestion run."""
+    articles: int
+    fetched: int
+    chunks: int
+    stored: int
+    seconds: float
+
+    @property
+    def articles_per_second(self) -> float:
+        return self.articles / self.seconds if self.seconds else 0.0
+
+def fetch_html(url: str) -> Optional[str]:
+    """
+    Downloads an HTML page through the shared transport, honouring the
+    per-host concurrency limit, the timeout and the maximum body size.
+    Returns None for non-HTML or failed responses.
+    """
+    # Pages are best-effort (the headline is kept on failure), so they are not
+    # retried; each host still gets its own circuit breaker.
+    with telemetry.span("tool", "article_fetch"):
+        with TRANSPORT.open("GET", url, retries=0, timeout=config.ARTICLE_TIMEOUT, stream=True) as response:
+            if response.status_code != 200:
+                return None
+            content_type = response.headers.get("Content-Type", "text/html").lower()
+            if "html" not in content_type:
+                return None
+            body = bytearray()
+            for block in response.iter_content(chunk_size=64 * 1024):
+                body.extend(block)
+                if len(body) >= config.ARTICLE_MAX_BYTES:
+                    break
+            # requests assumes ISO-8859-1 for text/* without a charset; most pages are UTF-8.
+            encoding = response.encoding if "charset" in content_type else "utf-8"
+    return body[:config.ARTICLE_MAX_BYTES].decode(encoding, errors="replace")
+
+def extract_main_text(html: str) -> str:
+    """Extracts the readable body of an article page, dropping navigation and boilerplate."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "lxml")
+    for tag in soup(_BOILERPLATE_TAGS):
+        tag.decompose()
+    root = soup.find("article") or soup.find("main") or soup.body or soup
+    paragraphs = [p.get_text(" ", strip=True) for p in root.find_all("p")]
+    paragraphs = [p for p in paragraphs if len(p) >= _MIN_PARAGRAPH_CHARS]
+    if paragraphs:
+        return "\n\n".join(paragraphs)
+    return root.get_text(" ", strip=True)
+
+_splitter = None
+
+def chunk_text(text: str) -> List[str]:
+    """Splits text into overlapping chunks sized for the embedding model."""
+    global _splitter
+    if _splitter is None:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        _splitter = RecursiveCharacterTextSplitter(
+            chunk_size=config.ARTICLE_CHUNK_SIZE, chunk_overlap=config.ARTICLE_CHUNK_OVERLAP
+        )
+    return _splitter.split_text(text)
+
+def _article_items(article: ArticleRef) -> Tuple[bool, List[IngestItem]]:
+    """Fetches one article and returns (fetched, ingest items for its chunks)."""
+    url, title, date, source = article
+    try:
+        html = fetch_html(url)
+        text = extract_main_text(html) if html else ""
+    except Exception:
+        text = ""
+    if not text:
+        return False, [(title, url, date, source)]
+    # The title is repeated on each chunk so every chunk says what it is about.
+    return True, [(f"{title}\n\n{chunk}", url, date, source) for chunk in chunk_text(text)]
+
+def ingest_articles(articles: Iterable[ArticleRef],
+                    sink: Callable[[List[IngestItem]], int] = upsert_documents) -> ArticleIngestResult:
+    """
+    Fetches, extracts and chunks articles concurrently, handing chunks to
+    `sink` in batches of ARTICLE_EMBED_BATCH as pages arrive. At most twice
+    the worker count of pages is in flight, so memory stays bounded no matter
+    how many articles are passed in.
+    """
+    start = time.monotonic()
+    articles_iter = iter(articles)
+    workers = config.ARTICLE_FETCH_WORKERS
+    total = fetched = chunks = stored = 0
+    buffer: List[IngestItem] = []
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="article-fetch") as executor:
+        in_flight = set()
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < workers * 2:
+                article = next(articles_iter, None)
+                if article is None:
+                    exhausted = True
+                    break
+                total += 1
+                in_flight.add(executor.submit(contextvars.copy_context().run, _article_items, article))
+            if not in_flight:
+                break
+
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                ok, items = future.result()
+                fetched += ok
+                chunks += len(items) if ok else 0
+                buffer.extend(items)
+            if len(buffer) >= config.ARTICLE_EMBED_BATCH:
+                stored += sink(buffer)
+                buffer = []
+
+    if buffer:
+        stored += sink(buffer)
+    return ArticleIngestResult(total, fetched, chunks, stored, time.monotonic() - start)
+
+def store_articles(refs: List[ArticleRef]) -> int:
+    """
+    Ingests articles as full text, or just their headlines when
+    ARTICLE_FETCH_ENABLED is off. Returns the number of newly stored documents.
+    """
+    if config.ARTICLE_FETCH_ENABLED:
+        return ingest_articles(refs).stored
+    return upsert_documents((title, url, date, src) for url, title, date, src in refs)
@@ -3,41 +3,100 @@
 A module for common, shared utility functions used by different tools.
 """
 import datetime
+import hashlib
+from typing import Iterable, NamedTuple, Tuple
 from langchain_core.documents import Document
-from config import VECTOR_DB
+import config
+import telemetry
 
-def upsert_document(text: str, url: str, dt_obj: datetime.datetime | datetime.date | str, src: str) -> None:
+# An ingestion item: (text, url, date, source), the same fields upsert_document takes.
+IngestItem = Tuple[str, str, object, str]
+
+class IngestResult(NamedTuple):
+    """Outcome of one search-and-ingest call: items returned by the source and newly stored documents."""
+    found: int
+    stored: int
+
+def _normalize_date(dt_obj) -> Tuple[int, str]:
     """
-    Creates a LangChain Document with standardized metadata and upserts it
-    into the Chroma vector store.
+    Returns a (unix timestamp, 'YYYY-MM-DD') pair for the supported date inputs.
 
     Handles date parsing from different formats.
     """
     # Create a Unix timestamp (integer) for numerical filtering in Chroma
     if isinstance(dt_obj, datetime.datetime):
-        timestamp = int(dt_obj.timestamp())
-        date_str = dt_obj.strftime('%Y-%m-%d')
-    elif isinstance(dt_obj, datetime.date):
+        return int(dt_obj.timestamp()), dt_obj.strftime('%Y-%m-%d')
+    if isinstance(dt_obj, datetime.date):
         timestamp = int(datetime.datetime.combine(dt_obj, datetime.time.min).timestamp())
-        date_str = dt_obj.strftime('%Y-%m-%d')
-    elif isinstance(dt_obj, str):
+        return timestamp, dt_obj.strftime('%Y-%m-%d')
+    if isinstance(dt_obj, str):
         # Attempt to parse common string date formats (e.g., from GDELT)
-        try:
-            parsed_dt = datetime.datetime.strptime(dt_obj, '%Y%m%d%H%M%S')
-            timestamp = int(parsed_dt.timestamp())
-            date_str = parsed_dt.strftime('%Y-%m-%d')
-        except ValueError:
-            # Fallback if parsing fails
-            timestamp = int(datetime.datetime.now().timestamp())
-            date_str = datetime.date.today().strftime('%Y-%m-%d')
-    else:
-        # Fallback for unexpected types
-        timestamp = int(datetime.datetime.now().timestamp())
-        date_str = datetime.date.today().strftime('%Y-%m-%d')
-
-
-    doc = Document(
-        page_content=text,
-        metadata={"url": url, "date": date_str, "timestamp": timestamp, "source": src}
-    )
-    VECTOR_DB.add_documents([doc])
+        for fmt in ('%Y%m%d%H%M%S', '%Y%m%dT%H%M%SZ'):
+            try:
+                parsed_dt = datetime.datetime.strptime(dt_obj, fmt)
+                return int(parsed_dt.timestamp()), parsed_dt.strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+    # Fallback for unexpected types or unparseable strings
+    return int(datetime.datetime.now().timestamp()), datetime.date.today().strftime('%Y-%m-%d')
+
+def document_id(url: str, text: str) -> str:
+    """
+    Deterministic document ID built from the URL and a hash of the content,
+    so the same article is stored once no matter how often it is fetched.
+    """
+    content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{url}\n{content_hash}".encode("utf-8")).hexdigest()[:32]
+
+def upsert_documents(items: Iterable[IngestItem]) -> int:
+    """
+    Ingests a batch of (text, url, date, source) items into the Chroma vector store.
+
+    Items are deduplicated within the batch and against what is already stored,
+    then the new ones are embedded in a single batch and written with one upsert
+    per weekly partition. New documents are added to the lexical index as well.
+
+    Returns:
+        int: The number of documents that were newly stored.
+    """
+    batch = {}
+    ingested_at = int(datetime.datetime.now().timestamp())
+    for text, url, dt_obj, src in items:
+        if not text:
+            continue
+        doc_id = document_id(url, text)
+        if doc_id in batch:
+            continue
+        timestamp, date_str = _normalize_date(dt_obj)
+        batch[doc_id] = Document(
+            page_content=text,
+            metadata={"url": url, "date": date_str, "timestamp": timestamp, "source": src,
+                      "ingested_at": ingested_at}
+        )
+    if not batch:
+        return 0
+
+    with telemetry.span("ingest", "upsert_documents", documents=len(batch)) as span:
+        # Only the IDs come back from this lookup; no documents or vectors are loaded.
+        existing = config.VECTOR_DB.existing_ids(batch)
+        new_ids = [doc_id for doc_id in batch if doc_id not in existing]
+        if new_ids:
+            # Documents already past retention are not written, so only the IDs
+            # that were are counted and indexed.
+            new_ids = config.VECTOR_DB.add_documents([batch[doc_id] for doc_id in new_ids], ids=new_ids)
+            # An index not built yet will read these from the store when it is.
+            if config.loaded("LEXICAL_INDEX"):
+                config.LEXICAL_INDEX.add(
+                    (doc_id, batch[doc_id].page_content, batch[doc_id].metadata["timestamp"]) for doc_id in new_ids
+                )
+        span.set(stored=len(new_ids))
+    return len(new_ids)
+
+def upsert_document(text: str, url: str, dt_obj: datetime.datetime | datetime.date | str, src: str) -> None:
+    """
+    Creates a LangChain Document with standardized metadata and upserts it
+    into the partitioned Chroma vector store.
+
+    Prefer upsert_documents when ingesting more than one item.
+    """
+    upsert_documents([(text, url, dt_obj, src)])
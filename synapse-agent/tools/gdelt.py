@@ -2,44 +2,60 @@
 """
 Defines the GDELT tool for searching global news articles.
 """
-import requests
 from pydantic import BaseModel, Field
 from langchain_core.tools import StructuredTool
-from tools.common import upsert_document
+from typing import List
+import config
+from tools.articles import ArticleRef, store_articles
+from tools.common import IngestResult
+from tools.transport import TRANSPORT
 
 class GdeltQuery(BaseModel):
     """Input model for the GDELT search tool."""
     query: str = Field(..., description="Search string, e.g., 'global supply chain disruptions'")
 
-def gdelt_news_search(query: str) -> str:
+def fetch_gdelt_articles(query: str) -> List[ArticleRef]:
     """
-    Fetches news articles from the GDELT project's document API and
-    ingests them into the vector store.
+    Fetches the matching article list from the GDELT project's document API.
+    Raises on network errors, or SourceUnavailable while GDELT is failing.
     """
-    api_url = "https://api.gdeltproject.org/api/v2/doc/doc"
     params = {
         "query": query,
         "mode": "ArtList",
         "maxrecords": 30,
         "format": "json",
     }
-    try:
-        response = requests.get(api_url, params=params, timeout=30)
-        response.raise_for_status()  # Raise an exception for bad status codes
-        articles = response.json().get("articles", [])
-        
-        if not articles:
-            return "GDELT search returned no articles."
+    response = TRANSPORT.get(config.GDELT_API_URL, source="gdelt", params=params)
+    response.raise_for_status()  # Raise an exception for bad status codes
+    articles = response.json().get("articles", [])
+    return [(art["url"], art["title"], art["seendate"], "gdelt") for art in articles]
+
+def ingest_gdelt_articles(query: str) -> IngestResult:
+    """
+    Fetches news articles from GDELT and ingests their full text (or just
+    the headlines when article fetching is disabled) into the vector store.
+    Raises on network errors.
+    """
+    refs = fetch_gdelt_articles(query)
+    return IngestResult(len(refs), store_articles(refs))
 
-        for art in articles:
-            upsert_document(art["title"], art["url"], art["seendate"], "gdelt")
-        
-        return f"Loaded {len(articles)} articles from GDELT into the vector store."
+def gdelt_news_search(query: str) -> str:
+    """
+    Searches GDELT and ingests the matching articles into the vector store.
+    """
+    import requests
+
+    try:
+        result = ingest_gdelt_articles(query)
     except requests.RequestException as e:
         return f"Failed to connect to GDELT: {e}"
     except Exception as e:
         return f"An error occurred during the GDELT search: {e}"
 
+    if not result.found:
+        return "GDELT search returned no articles."
+    return f"Loaded {result.found} articles from GDELT into the vector store ({result.stored} new)."
+
 GDELT_TOOL = StructuredTool.from_function(
     func=gdelt_news_search,
     name="gdelt_news_search",
@@ -0,0 +1,261 @@
+# tools/market_data.py
+"""
+A market-data layer that fetches many tickers per request and caches the results.
+
+Quotes and OHLCV history are kept in memory with a short TTL, longer history
+is persisted as one Parquet file per ticker, and symbols that yfinance
+reports as missing are remembered so they are not looked up again until
+their entry expires.
+"""
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+import config
+import telemetry
+from tools.transport import TRANSPORT, TransientError
+
+# Approximate calendar days covered by the yfinance period strings we cache on disk.
+_PERIOD_DAYS = {"5d": 5, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731, "5y": 1827}
+# yfinance errors that mean the symbol itself has no data, as opposed to a
+# network error, timeout or rate limit.
+_NOT_FOUND_RE = re.compile(r"delisted|not found|no timezone", re.IGNORECASE)
+
+class MarketDataUnavailable(TransientError):
+    """Raised when a download returns no data at all and yfinance gives no reason."""
+
+@dataclass(frozen=True)
+class Quote:
+    """The latest daily bar for a ticker, plus the previous close."""
+    ticker: str
+    last_close: float
+    prev_close: float
+    high: float
+    low: float
+    volume: int
+    date: str
+
+    @property
+    def change(self) -> float:
+        return self.last_close - self.prev_close
+
+    @property
+    def change_percent(self) -> float:
+        return (self.change / self.prev_close) * 100 if self.prev_close else 0.0
+
+def _normalize(tickers: Iterable[str]) -> List[str]:
+    """Upper-cases and de-duplicates tickers, preserving order."""
+    return list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+
+def _split_download(frame, tickers: List[str]) -> Dict[str, object]:
+    """Splits a yf.download result into one non-empty DataFrame per ticker."""
+    import pandas as pd
+
+    per_ticker = {}
+    for ticker in tickers:
+        if isinstance(frame.columns, pd.MultiIndex):
+            if ticker not in frame.columns.get_level_values(0):
+                continue
+            sub = frame[ticker]
+        else:
+            sub = frame
+        sub = sub.dropna(how="all")
+        if not sub.empty:
+            per_ticker[ticker] = sub
+    return per_ticker
+
+def _download_errors(yf) -> Dict[str, str]:
+    """
+    The per-ticker errors yfinance recorded for its last download; it logs
+    them and returns an empty or partial frame instead of raising.
+    """
+    errors = getattr(getattr(yf, "shared", None), "_ERRORS", None)
+    return {str(k).upper(): str(v) for k, v in errors.items()} if isinstance(errors, dict) else {}
+
+def _fetch(tickers: List[str], **kwargs):
+    """
+    One yf.download call, for TRANSPORT.call(). Returns the per-ticker frames
+    and yfinance's errors; raises MarketDataUnavailable (retryable) when
+    nothing came back and not every ticker was reported missing, which is
+    how yfinance surfaces network errors, timeouts and rate limits.
+    """
+    import yfinance as yf
+
+    frame = yf.download(tickers, **kwargs)
+    errors = _download_errors(yf)
+    per_ticker = _split_download(frame, tickers) if frame is not None else {}
+    if not per_ticker:
+        unexplained = [ticker for ticker in tickers if not _NOT_FOUND_RE.search(errors.get(ticker, ""))]
+        if unexplained:
+            reason = errors.get(unexplained[0], "no data returned")
+            raise MarketDataUnavailable(f"yfinance returned no data for {', '.join(unexplained)} ({reason}).")
+    return per_ticker, errors
+
+def _quote_from_frame(ticker: str, frame) -> Quote:
+    """Builds a Quote from the last two daily bars of a history frame."""
+    last = frame.iloc[-1]
+    prev_close = frame["Close"].iloc[-2] if len(frame) > 1 else last["Close"]
+    volume = last["Volume"]
+    return Quote(
+        ticker=ticker,
+        last_close=float(last["Close"]),
+        prev_close=float(prev_close),
+        high=float(last["High"]),
+        low=float(last["Low"]),
+        volume=0 if math.isnan(volume) else int(volume),
+        date=frame.index[-1].strftime('%Y-%m-%d'),
+    )
+
+class MarketDataEngine:
+    """
+    Batched, cached access to yfinance.
+
+    All lookups for a call are made in one yf.download request for the
+    tickers that are not already cached.
+    """
+
+    def __init__(self, quote_ttl: float, history_ttl: float, negative_ttl: float,
+                 disk_ttl: float, cache_dir: str):
+        self.quote_ttl = quote_ttl
+        self.history_ttl = history_ttl
+        self.negative_ttl = negative_ttl
+        self.disk_ttl = disk_ttl
+        self.cache_dir = cache_dir
+        self._quotes: Dict[str, tuple] = {}
+        self._history: Dict[tuple, tuple] = {}
+        self._invalid: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _is_invalid(self, ticker: str, now: float) -> bool:
+        expires = self._invalid.get(ticker)
+        return expires is not None and expires > now
+
+    def _download(self, tickers: List[str], period: str, interval: str = "1d") -> Dict[str, object]:
+        """
+        One bulk request for all `tickers`. A symbol without data is
+        negatively cached only when yfinance reported it missing or delisted,
+        or when other symbols in the batch returned data and it had no other
+        error. A download that returns nothing for any other reason is
+        retried under the yfinance circuit breaker and then raises
+        MarketDataUnavailable (or SourceUnavailable while the breaker is
+        open), so an outage is never mistaken for bad symbols.
+        """
+        with telemetry.span("tool", "yfinance", tickers=len(tickers), period=period) as span:
+            per_ticker, errors = TRANSPORT.call(
+                "yfinance", _fetch, tickers, period=period, interval=interval, group_by="ticker",
+                auto_adjust=False, threads=True, progress=False,
+            )
+            span.set(documents=len(per_ticker))
+
+        invalid = [ticker for ticker in tickers if ticker not in per_ticker and
+                   (_NOT_FOUND_RE.search(errors.get(ticker, "")) or (per_ticker and ticker not in errors))]
+        expires = time.time() + self.negative_ttl
+        with self._lock:
+            for ticker in invalid:
+                self._invalid[ticker] = expires
+        return per_ticker
+
+    def get_quotes(self, tickers: Iterable[str]) -> Dict[str, Optional[Quote]]:
+        """
+        Returns the latest quote for each ticker, or None for symbols with no data.
+        Raises MarketDataUnavailable when yfinance returned nothing at all.
+        """
+        tickers = _normalize(tickers)
+        now = time.time()
+        quotes: Dict[str, Optional[Quote]] = {}
+        to_fetch = []
+        with self._lock:
+            for ticker in tickers:
+                cached = self._quotes.get(ticker)
+                if cached and cached[0] > now:
+                    quotes[ticker] = cached[1]
+                elif self._is_invalid(ticker, now):
+                    quotes[ticker] = None
+                else:
+                    to_fetch.append(ticker)
+
+        if to_fetch:
+            # Five sessions so the previous close is the prior trading day's.
+            frames = self._download(to_fetch, period="5d")
+            expires = time.time() + self.quote_ttl
+            with self._lock:
+                for ticker in to_fetch:
+                    frame = frames.get(ticker)
+                    quote = _quote_from_frame(ticker, frame) if frame is not None else None
+                    if quote is not None:
+                        self._quotes[ticker] = (expires, quote)
+                    quotes[ticker] = quote
+        return {ticker: quotes[ticker] for ticker in tickers}
+
+    def _disk_path(self, ticker: str, interval: str) -> str:
+        return os.path.join(self.cache_dir, f"{ticker}_{interval}.parquet")
+
+    def _read_disk(self, ticker: str, period: str, interval: str):
+        """Returns cached history from disk if it is fresh and covers `period`."""
+        import pandas as pd
+
+        path = self._disk_path(ticker, interval)
+        if not os.path.exists(path) or time.time() - os.path.getmtime(path) > self.disk_ttl:
+            return None
+        frame = pd.read_parquet(path)
+        days = _PERIOD_DAYS.get(period)
+        if days is None or frame.empty:
+            return None
+        start = pd.Timestamp.now(tz=frame.index.tz).normalize() - pd.Timedelta(days=days)
+        # A few days of slack for weekends and holidays at the start of the window.
+        if frame.index[0] > start + pd.Timedelta(days=4):
+            return None
+        return frame[frame.index >= start]
+
+    def get_history(self, tickers: Iterable[str], period: str = "1mo",
+                    interval: str = "1d") -> Dict[str, object]:
+        """
+        Returns OHLCV history DataFrames per ticker (None for symbols with no data),
+        served from memory, then disk, then one bulk download for the rest.
+        """
+        tickers = _normalize(tickers)
+        now = time.time()
+        history: Dict[str, object] = {}
+        to_fetch = []
+        with self._lock:
+            for ticker in tickers:
+                cached = self._history.get((ticker, period, interval))
+                if cached and cached[0] > now:
+                    history[ticker] = cached[1]
+                elif self._is_invalid(ticker, now):
+                    history[ticker] = None
+                else:
+                    to_fetch.append(ticker)
+
+        to_download = []
+        for ticker in to_fetch:
+            frame = self._read_disk(ticker, period, interval)
+            if frame is None:
+                to_download.append(ticker)
+            else:
+                history[ticker] = frame
+
+        if to_download:
+            frames = self._download(to_download, period=period, interval=interval)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for ticker, frame in frames.items():
+                frame.to_parquet(self._disk_path(ticker, interval))
+            history.update(frames)
+
+        expires = time.time() + self.history_ttl
+        with self._lock:
+            for ticker in to_fetch:
+                if history.get(ticker) is not None:
+                    self._history[(ticker, period, interval)] = (expires, history[ticker])
+        return {ticker: history.get(ticker) for ticker in tickers}
+
+MARKET_DATA = MarketDataEngine(
+    quote_ttl=config.MARKET_QUOTE_TTL,
+    history_ttl=config.MARKET_HISTORY_TTL,
+    negative_ttl=config.MARKET_NEGATIVE_TTL,
+    disk_ttl=config.MARKET_DISK_TTL,
+    cache_dir=config.MARKET_CACHE_DIR,
+)
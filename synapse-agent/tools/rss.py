@@ -3,22 +3,38 @@
 Defines the RSS tool for importing articles from a specific feed URL.
 """
 import datetime
-import feedparser
+from typing import List
 from pydantic import BaseModel, Field
 from langchain_core.tools import StructuredTool
-from tools.common import upsert_document
+from tools.articles import ArticleRef, store_articles
+from tools.transport import TRANSPORT
 
 class RssQuery(BaseModel):
     """Input model for the RSS feed tool."""
     feed_url: str = Field(..., description="A valid public RSS or Atom feed URL.")
 
+def entry_refs(entries) -> List[ArticleRef]:
+    """Converts feedparser entries into article references for ingestion."""
+    refs = []
+    for entry in entries:
+        # Get the published or updated date, falling back to now.
+        date_struct = entry.get("published_parsed") or entry.get("updated_parsed")
+        dt_obj = datetime.datetime(*date_struct[:6]) if date_struct else datetime.datetime.now()
+        refs.append((entry.link, entry.title, dt_obj, "rss"))
+    return refs
+
 def import_from_rss(feed_url: str) -> str:
     """
     Parses and ingests the latest 20 items from any public RSS or Atom feed
     into the vector store.
     """
+    import feedparser
+
     try:
-        parsed_feed = feedparser.parse(feed_url)
+        response = TRANSPORT.get(feed_url)
+        if response.status_code != 200:
+            return f"Error fetching RSS feed: HTTP {response.status_code}"
+        parsed_feed = feedparser.parse(response.content, response_headers=dict(response.headers))
         if parsed_feed.bozo:
             return f"Error parsing RSS feed: {parsed_feed.bozo_exception}"
 
@@ -26,14 +42,8 @@ def import_from_rss(feed_url: str) -> str:
         if not entries:
             return "No items found in the RSS feed."
 
-        for entry in entries:
-            # Get the published or updated date, falling back to now.
-            date_struct = entry.get("published_parsed") or entry.get("updated_parsed")
-            dt_obj = datetime.datetime(*date_struct[:6]) if date_struct else datetime.datetime.now()
-            
-            upsert_document(entry.title, entry.link, dt_obj, "rss")
-
-        return f"Loaded {len(entries)} items from the RSS feed into the vector store."
+        stored = store_articles(entry_refs(entries))
+        return f"Loaded {len(entries)} items from the RSS feed into the vector store ({stored} new)."
     except Exception as e:
         return f"An unexpected error occurred while processing the RSS feed: {e}"
 
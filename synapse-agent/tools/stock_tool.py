@@ -1,38 +1,51 @@
 # tools/stock_tool.py
-
-import yfinance as yf
+"""
+Defines the stock price tool, a thin front end to the cached market-data layer.
+"""
+from typing import List, Optional
 from pydantic import BaseModel, Field
 from langchain_core.tools import StructuredTool
+from tools.market_data import MARKET_DATA, Quote
+from tools.symbols import validate_tickers
 
 class StockQuery(BaseModel):
     """Input model for the stock price tool."""
     ticker: str = Field(..., description="The stock ticker symbol, e.g., 'AAPL' or 'GOOGL'.")
 
-def get_stock_price(ticker: str) -> str:
+def format_quote(ticker: str, quote: Optional[Quote]) -> str:
+    """Formats a quote (or its absence) as text for an agent or prompt."""
+    if quote is None:
+        return f"Could not find data for ticker: {ticker}. It may be delisted or invalid."
+    return (
+        f"Latest data for {quote.ticker} ({quote.date}):\n"
+        f"Closing Price: ${quote.last_close:.2f}\n"
+        f"Change: ${quote.change:.2f} ({quote.change_percent:.2f}%)\n"
+        f"Day's High: ${quote.high:.2f}\n"
+        f"Day's Low: ${quote.low:.2f}\n"
+        f"Volume: {quote.volume:,}"
+    )
+
+def get_stock_prices(tickers: List[str]) -> str:
     """
-    Fetches the last closing price and other key info for a given stock ticker.
+    Fetches quotes for several tickers in one batched request. Tickers are
+    checked against the local symbol table first; ones that cannot be valid
+    are reported without a network call.
     """
+    valid, rejected = validate_tickers(tickers)
+    blocks = [f"Could not find data for ticker: {ticker}. It is not a recognized symbol." for ticker in rejected]
+    if not valid:
+        return "\n\n".join(blocks)
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.history(period="1d")
-        if info.empty:
-            return f"Could not find data for ticker: {ticker}. It may be delisted or invalid."
-        
-        last_close = info['Close'].iloc[-1]
-        prev_close = info['Close'].iloc[0] if len(info['Close']) > 1 else last_close
-        change = last_close - prev_close
-        change_percent = (change / prev_close) * 100 if prev_close != 0 else 0
-
-        return (
-            f"Latest data for {ticker}:\n"
-            f"Closing Price: ${last_close:.2f}\n"
-            f"Change: ${change:.2f} ({change_percent:.2f}%)\n"
-            f"Day's High: ${info['High'].iloc[-1]:.2f}\n"
-            f"Day's Low: ${info['Low'].iloc[-1]:.2f}\n"
-            f"Volume: {info['Volume'].iloc[-1]:,}"
-        )
+        quotes = MARKET_DATA.get_quotes(valid)
     except Exception as e:
-        return f"An error occurred while fetching stock data for {ticker}: {e}"
+        return f"An error occurred while fetching stock data for {', '.join(valid)}: {e}"
+    return "\n\n".join([format_quote(ticker, quote) for ticker, quote in quotes.items()] + blocks)
+
+def get_stock_price(ticker: str) -> str:
+    """
+    Fetches the last closing price and other key info for a given stock ticker.
+    """
+    return get_stock_prices([ticker])
 
 STOCK_PRICE_TOOL = StructuredTool.from_function(
     func=get_stock_price,
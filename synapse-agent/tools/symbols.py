@@ -0,0 +1,372 @@
+# tools/symbols.py
+"""
+A local ticker and company-name resolver.
+
+The symbol table (SYMBOLS_PATH, a TSV of symbol, name and aliases) is
+compiled into a compact index file: records sorted by lookup key behind a
+table of offsets, memory-mapped and searched by bisection, so lookups need
+no parsing at startup and a full exchange listing costs only page cache.
+The index is rebuilt whenever the TSV is newer.
+
+It is used to validate and correct tickers before any market-data call, to
+find the companies a query mentions, and to plan simple ticker questions
+("how is AAPL doing?") without an LLM call.
+"""
+import mmap
+import os
+import re
+import struct
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+_MAGIC = b"SYMIDX1\n"
+_SEP = b"\x1f"
+# Record kinds: an exact symbol, a name or alias, or a name or alias that is
+# also a common word and only matches when capitalized ('~' in the TSV).
+_SYMBOL, _NAME, _CAPITALIZED = "s", "n", "c"
+# Exchange symbols, indices (^GSPC), share classes (BRK-B), futures (GC=F) and pairs (BTC-USD).
+_TICKER_RE = re.compile(r"^\^?[A-Z0-9]{1,6}(?:[.\-=][A-Z0-9]{1,4})?$")
+_WORD_RE = re.compile(r"\$?\^?[A-Za-z0-9][A-Za-z0-9.&'=\-]*")
+# Upper-case words that are far more often acronyms than tickers in a question.
+_NOT_TICKERS = frozenset(
+    "A I AI ALL AND ARE BE CEO CFO CPI EPS ESG ETF EU EV EVS FED FOMC FOR GDP GO IPO IT LLM M&A NEW NOW "
+    "ON ONE OR PMI Q1 Q2 Q3 Q4 QOQ REIT SEC SO THE UK US USA YOY".split()
+)
+# Words a "simple" ticker question may contain besides the companies themselves.
+_SIMPLE_WORDS = frozenset(
+    "a about and are as at between compare compared did do does doing done for from going has have how "
+    "how's hows "
+    "in is it its latest look looking market me news now of on or performance performing price prices "
+    "quote quotes recent recently share shares show stock stocks tell the their them these this to today "
+    "trading update updates versus vs was week what what's whats why with".split()
+)
+# Capitalized words that open a question rather than name a company.
+_QUESTION_WORDS = frozenset(
+    "any analyze assess can could describe explain give list outline please should summarize "
+    "when where which who whose will would".split()
+)
+# Name suffixes dropped when deriving aliases from an exchange listing.
+_NAME_SUFFIX_RE = re.compile(
+    r"(?:,?\s+(?:inc|incorporated|corp|corporation|co|company|ltd|limited|plc|sa|nv|ag|holdings?|group|"
+    r"class [a-z]|common stock|ordinary shares|american depositary shares.*|ads|- .*)\.?)+$", re.IGNORECASE
+)
+
+class Symbol(NamedTuple):
+    """A resolved instrument: its ticker and display name."""
+    symbol: str
+    name: str
+
+class SymbolMatch(NamedTuple):
+    """A company or ticker found in a query, with the words that matched."""
+    symbol: str
+    name: str
+    text: str
+
+def read_symbols(path: str) -> Iterator[Tuple[str, str, List[str]]]:
+    """Reads (symbol, name, aliases) rows from a symbols TSV, skipping comments."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            aliases = [a.strip() for a in fields[2].split("|") if a.strip()] if len(fields) > 2 else []
+            yield fields[0].strip().upper(), fields[1].strip() if len(fields) > 1 else "", aliases
+
+def build_index(rows: Iterable[Tuple[str, str, List[str]]], path: str) -> int:
+    """
+    Compiles symbol rows into an index file at `path`. Symbols take
+    precedence over names and aliases with the same key, and earlier rows
+    over later ones. Returns the number of records.
+    """
+    records: Dict[bytes, bytes] = {}
+    aliases = []
+    for symbol, name, row_aliases in rows:
+        display = name.lstrip("~") or symbol
+        value = _SEP.join([symbol.encode("utf-8"), display.encode("utf-8")])
+        records.setdefault(symbol.lower().encode("utf-8"), _SYMBOL.encode() + _SEP + value)
+        for alias in ([name] if name else []) + row_aliases:
+            kind = _CAPITALIZED if alias.startswith("~") else _NAME
+            key = " ".join(alias.lstrip("~").lower().split()).encode("utf-8")
+            if key:
+                aliases.append((key, kind.encode() + _SEP + value))
+    for key, value in aliases:
+        records.setdefault(key, value)
+
+    keys = sorted(records)
+    blob = bytearray()
+    offsets = []
+    for key in keys:
+        offsets.append(len(blob))
+        blob += key + _SEP + records[key] + b"\n"
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_MAGIC + struct.pack("<I", len(keys)))
+        f.write(struct.pack(f"<{len(keys)}I", *offsets))
+        f.write(blob)
+    os.replace(tmp, path)
+    return len(keys)
+
+class SymbolTable:
+    """Read-only lookups over a memory-mapped index built by build_index()."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{path} is not a symbol index.")
+        (self._count,) = struct.unpack_from("<I", self._mm, len(_MAGIC))
+        self._offsets = len(_MAGIC) + 4
+        self._blob = self._offsets + 4 * self._count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _key_at(self, i: int) -> Tuple[bytes, int]:
+        (offset,) = struct.unpack_from("<I", self._mm, self._offsets + 4 * i)
+        start = self._blob + offset
+        end = self._mm.find(_SEP, start)
+        return self._mm[start:end], end + 1
+
+    def _lookup(self, key: str) -> Optional[Tuple[str, Symbol]]:
+        """Bisects for `key`; returns (kind, Symbol) or None."""
+        target = key.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid)[0] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self._count:
+            return None
+        found, value_start = self._key_at(lo)
+        if found != target:
+            return None
+        kind, symbol, name = self._mm[value_start:self._mm.find(b"\n", value_start)].split(_SEP)
+        return kind.decode(), Symbol(symbol.decode("utf-8"), name.decode("utf-8"))
+
+    def symbol(self, ticker: str) -> Optional[Symbol]:
+        """The listed instrument with exactly this ticker, if any."""
+        entry = self._lookup(ticker.strip().lower())
+        return entry[1] if entry and entry[0] == _SYMBOL else None
+
+    def resolve(self, text: str) -> Optional[Symbol]:
+        """A ticker, or a company name or alias in any case ('nvidia', 'Bank of America')."""
+        entry = self._lookup(" ".join(text.lower().split()))
+        return entry[1] if entry else None
+
+    def find_entities(self, query: str, max_words: int = 4) -> Tuple[List[SymbolMatch], List[str]]:
+        """
+        Finds the companies and tickers mentioned in `query`, longest phrase
+        first. Returns the matches and the words left over.
+        """
+        words = _WORD_RE.findall(query)
+        matches: List[SymbolMatch] = []
+        leftover: List[str] = []
+        i = 0
+        while i < len(words):
+            for n in range(min(max_words, len(words) - i), 0, -1):
+                phrase = " ".join(words[i:i + n])
+                match = self._match(phrase, single=n == 1)
+                if match:
+                    if match.symbol not in {m.symbol for m in matches}:
+                        matches.append(match)
+                    i += n
+                    break
+            else:
+                leftover.append(words[i])
+                i += 1
+        return matches, leftover
+
+    def _match(self, phrase: str, single: bool) -> Optional[SymbolMatch]:
+        text = phrase[:-2] if phrase.lower().endswith("'s") else phrase
+        explicit = text.startswith("$")
+        text = text.lstrip("$").rstrip(".")
+        entry = self._lookup(" ".join(text.lower().split()))
+        if entry is None:
+            return None
+        kind, found = entry
+        if kind == _SYMBOL:
+            # A bare word is only a ticker when written in capitals ('AAPL', not 'a' or 'now').
+            if not explicit and not (single and text.isupper() and text not in _NOT_TICKERS):
+                return None
+        elif kind == _CAPITALIZED and not text[:1].isupper():
+            return None
+        return SymbolMatch(found.symbol, found.name, phrase)
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+def load_symbol_table(source: str, index_path: str) -> SymbolTable:
+    """Opens the index for `source`, rebuilding it first if it is missing or older than the TSV."""
+    if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(source):
+        build_index(read_symbols(source), index_path)
+    return SymbolTable(index_path)
+
+def validate_tickers(tickers: Iterable[str], strict: Optional[bool] = None,
+                     query: Optional[str] = None) -> Tuple[List[str], List[str]]:
+    """
+    Checks tickers before any market-data call. Listed tickers pass,
+    company names are replaced by their ticker ('Google' -> 'GOOGL'), and
+    anything that cannot be a ticker is rejected.
+
+    A well-formed ticker that is not in the table is rejected when `strict`
+    (default SYMBOLS_STRICT, for use with a full exchange listing). Without
+    it, the seed table cannot tell an unlisted company from an invented
+    symbol, so such a ticker passes as unverified (the market-data layer's
+    not-found cache catches invented ones) unless `query` is given and
+    gives it nothing to stand for: it is neither written in the query nor
+    is there a capitalized name the table could not resolve ('Roku').
+    Returns (valid, rejected).
+    """
+    import config
+
+    strict = config.SYMBOLS_STRICT if strict is None else strict
+    table = config.SYMBOLS
+    mentioned, could_name = set(), False
+    if query is not None and not strict:
+        mentioned = set(query_entities(query))
+        could_name = bool(unresolved_names(query))
+    valid, rejected, unverified = [], [], []
+    for raw in tickers:
+        ticker = raw.strip().lstrip("$").upper()
+        # Yahoo writes share classes with a dash (BRK-B); 'BRK.B' is the common spelling.
+        found = table.symbol(ticker) or table.symbol(ticker.replace(".", "-")) or table.resolve(raw)
+        if found:
+            ticker = found.symbol
+        elif strict or not _TICKER_RE.match(ticker) or \
+                (query is not None and ticker not in mentioned and not could_name):
+            rejected.append(raw)
+            continue
+        else:
+            unverified.append(ticker)
+        if ticker not in valid:
+            valid.append(ticker)
+    if unverified:
+        print(f"Unverified tickers (not in the symbol table): {unverified}")
+    return valid, rejected
+
+def query_entities(query: str) -> List[str]:
+    """
+    The instruments a query is about: tickers and company names found in
+    the symbol table, plus unlisted words written like tickers ('FAKEX',
+    '$ZZZ'). Sorted, so queries about the same instruments compare equal.
+    """
+    import config
+
+    matches, leftover = config.SYMBOLS.find_entities(query)
+    entities = {match.symbol for match in matches}
+    for word in leftover:
+        ticker = word.rstrip(".,?!").lstrip("$")
+        if (word.startswith("$") or ticker.isupper()) and _TICKER_RE.match(ticker.upper()) \
+                and ticker.upper() not in _NOT_TICKERS:
+            entities.add(ticker.upper())
+    return sorted(entities)
+
+def unresolved_names(query: str) -> List[str]:
+    """
+    Capitalized words in a query that the symbol table did not resolve,
+    lower-cased and sorted: usually companies outside the table ('Roku',
+    'Lucid Motors'). Words written like tickers are left to query_entities.
+    """
+    import config
+
+    _, leftover = config.SYMBOLS.find_entities(query)
+    names = set()
+    for word in leftover:
+        word = word.lstrip("$").rstrip(".,?!")
+        word = word[:-2] if word.lower().endswith("'s") else word
+        if not word[:1].isupper() or word.isupper():
+            continue
+        lowered = word.lower()
+        if lowered not in _SIMPLE_WORDS and lowered not in _QUESTION_WORDS:
+            names.add(lowered)
+    return sorted(names)
+
+def simple_plan(query: str, max_words: int = 12) -> Optional[Dict]:
+    """
+    A research plan for questions that only ask how one to three named
+    companies or tickers are doing, built without an LLM; None for anything else.
+    """
+    import config
+
+    if len(query.split()) > max_words:
+        return None
+    matches, leftover = config.SYMBOLS.find_entities(query)
+    if not 1 <= len(matches) <= 3:
+        return None
+    if any(word.lower().strip(".,?!'") not in _SIMPLE_WORDS for word in leftover):
+        return None
+
+    search_queries = []
+    for match in matches:
+        # Indices, futures and crypto pairs are not stocks.
+        kind = "stock" if re.match(r"^[A-Z]{1,5}(?:-[A-Z])?$", match.symbol) else "market"
+        search_queries.append(f"{match.name} ({match.symbol}) {kind} news")
+        search_queries.append(f"{match.name} latest news")
+    if len(matches) == 1:
+        search_queries.append(f"{matches[0].name} analyst outlook")
+    return {"search_queries": search_queries, "stock_tickers": [m.symbol for m in matches]}
+
+def _listing_rows(path: str) -> Iterator[Tuple[str, str, List[str]]]:
+    """Reads a NASDAQ Trader style listing (pipe-delimited, with a header) or a symbols TSV."""
+    with open(path, encoding="utf-8") as f:
+        header = f.readline()
+    if "|" not in header:
+        yield from read_symbols(path)
+        return
+    columns = header.rstrip("\n").split("|")
+    symbol_col = columns.index("ACT Symbol") if "ACT Symbol" in columns else columns.index("Symbol")
+    name_col = columns.index("Security Name")
+    test_col = columns.index("Test Issue") if "Test Issue" in columns else None
+    with open(path, encoding="utf-8") as f:
+        next(f)
+        for line in f:
+            fields = line.rstrip("\n").split("|")
+            if len(fields) <= max(symbol_col, name_col) or line.startswith("File Creation Time"):
+                continue
+            if test_col is not None and fields[test_col] == "Y":
+                continue
+            # Yahoo writes share classes with a dash (BRK-B) where listings use a dot or dollar.
+            symbol = fields[symbol_col].replace(".", "-").replace("$", "-P")
+            name = _NAME_SUFFIX_RE.sub("", fields[name_col]).strip()
+            yield symbol, name or symbol, []
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the local symbol table.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Merge an exchange listing into a symbols TSV.")
+    build.add_argument("listing", help="nasdaqlisted.txt / otherlisted.txt, or another symbols TSV.")
+    build.add_argument("output", help="The symbols TSV to write; its existing rows (and aliases) are kept.")
+    lookup = sub.add_parser("lookup", help="Resolve tickers or names against the configured table.")
+    lookup.add_argument("text", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        rows = {symbol: (name, aliases) for symbol, name, aliases in
+                (read_symbols(args.output) if os.path.exists(args.output) else [])}
+        added = 0
+        for symbol, name, aliases in _listing_rows(args.listing):
+            if symbol not in rows:
+                rows[symbol] = (name, aliases)
+                added += 1
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write("# symbol\tname\taliases (| separated; ~ marks common words matched only when capitalized)\n")
+            for symbol, (name, aliases) in rows.items():
+                f.write(f"{symbol}\t{name}\t{'|'.join(aliases)}\n")
+        print(f"Wrote {len(rows)} symbols to {args.output} ({added} new).")
+        return
+
+    import config
+    for text in args.text:
+        print(f"{text}: {config.SYMBOLS.symbol(text) or config.SYMBOLS.resolve(text)}")
+    print(simple_plan(" ".join(args.text)))
+
+if __name__ == "__main__":
+    main()
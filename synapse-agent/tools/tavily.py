@@ -4,40 +4,61 @@ Defines the Tavily web search tool for real-time information retrieval.
 """
 import os
 import datetime
+import threading
 from pydantic import BaseModel, Field
-from tavily import TavilyClient
 from langchain_core.tools import StructuredTool
-from tools.common import upsert_document
+from tools.common import IngestResult, upsert_documents
+from tools.transport import TRANSPORT
 
 class TavilyQuery(BaseModel):
     """Input model for the Tavily web search tool."""
     query: str = Field(..., description="The search query for the Tavily search engine.")
 
-def tavily_web_search(query: str) -> str:
+_clients = {}
+_clients_lock = threading.Lock()
+
+def _get_client(api_key: str):
+    """One TavilyClient per API key, reused across searches."""
+    with _clients_lock:
+        if api_key not in _clients:
+            from tavily import TavilyClient
+
+            _clients[api_key] = TavilyClient(api_key=api_key)
+        return _clients[api_key]
+
+def ingest_tavily_results(query: str) -> IngestResult:
     """
     Uses the Tavily API to search the web, then ingests the results
-    into the vector store.
+    into the vector store. Raises on configuration or network errors.
     """
     api_key = os.getenv("TAVILY_API_KEY")
     if not api_key:
-        return "TAVILY_API_KEY environment variable not set. Cannot use this tool."
-
-    try:
-        client = TavilyClient(api_key=api_key)
-        response = client.search(query=query, search_depth="advanced", max_results=7)
-        results = response.get("results", [])
+        raise RuntimeError("TAVILY_API_KEY environment variable not set. Cannot use this tool.")
 
-        if not results:
-            return "Tavily search returned no results."
+    # Retries, backoff and the circuit breaker come from the shared transport.
+    response = TRANSPORT.call("tavily", _get_client(api_key).search,
+                              query=query, search_depth="advanced", max_results=7)
+    results = response.get("results", [])
 
-        search_date = datetime.date.today()
-        for res in results:
-            upsert_document(res["content"], res["url"], search_date, "tavily")
+    search_date = datetime.date.today()
+    stored = upsert_documents(
+        (res["content"], res["url"], search_date, "tavily") for res in results
+    )
+    return IngestResult(len(results), stored)
 
-        return f"Loaded {len(results)} search results from Tavily into the vector store."
+def tavily_web_search(query: str) -> str:
+    """
+    Searches the web with Tavily and ingests the results into the vector store.
+    """
+    try:
+        result = ingest_tavily_results(query)
     except Exception as e:
         return f"An error occurred during the Tavily search: {e}"
 
+    if not result.found:
+        return "Tavily search returned no results."
+    return f"Loaded {result.found} search results from Tavily into the vector store ({result.stored} new)."
+
 TAVILY_TOOL = StructuredTool.from_function(
     func=tavily_web_search,
     name="tavily_web_search",
@@ -0,0 +1,301 @@
+# tools/transport.py
+"""
+The shared outbound transport for every network-bound tool.
+
+Plain HTTP (GDELT, RSS feeds, article pages) goes through one pooled
+requests session with keep-alive connections and a per-host concurrency
+limit. SDK clients that do their own HTTP (Tavily) are wrapped with call().
+Either way, retryable failures (timeouts, connection errors, 429 and 5xx)
+are retried with jittered exponential backoff, and each source has a
+circuit breaker: after HTTP_BREAKER_FAILURES consecutive failures it opens
+and calls fail fast with SourceUnavailable until HTTP_BREAKER_COOLDOWN has
+passed, when one probe call decides whether it closes again.
+
+Per-source latency and error counters are kept so callers such as the
+SearchSpecialist can skip sources that are failing or slow.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlsplit
+import config
+import telemetry
+
+# HTTP statuses worth retrying: rate limiting and transient server errors.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Weight of the newest sample in the latency moving average.
+_LATENCY_ALPHA = 0.3
+
+class SourceUnavailable(RuntimeError):
+    """Raised instead of calling a source whose circuit breaker is open."""
+
+class TransientError(RuntimeError):
+    """
+    Raised by functions wrapped with call() for failures their SDK reports by
+    returning rather than raising (yfinance's empty frame), so they are
+    retried and counted against the source like a timeout.
+    """
+
+class SourceHealth:
+    """Latency and error counters and the circuit breaker for one source."""
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.consecutive_failures = 0
+        self.latency = None  # exponential moving average, in seconds
+        self.last_attempt = 0.0
+        self.state = "closed"  # closed, open or half_open
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Whether a call may go ahead. An open breaker lets one probe through after the cooldown."""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    return False
+                self.state = "half_open"
+            elif self.state == "half_open":
+                return False  # a probe is already in flight
+            self.last_attempt = time.monotonic()
+            return True
+
+    def retried(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record(self, ok: bool, seconds: float) -> bool:
+        """Records an attempt's outcome; returns True when a failure leaves the breaker open."""
+        with self._lock:
+            self.requests += 1
+            self.latency = seconds if self.latency is None else (
+                _LATENCY_ALPHA * seconds + (1 - _LATENCY_ALPHA) * self.latency)
+            if ok:
+                self.consecutive_failures = 0
+                self.state = "closed"
+                return False
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            return self.state == "open"
+
+    def available(self, max_latency: Optional[float] = None) -> bool:
+        """
+        False while the breaker is open or a half-open probe is in flight
+        (acquire() would reject the call), or while the source was last
+        measured slower than `max_latency`; either way it becomes available
+        again once the cooldown has passed, so a recovered source is tried again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == "half_open" or (self.state == "open" and now - self.opened_at < self.cooldown):
+                return False
+            slow = max_latency is not None and self.latency is not None and self.latency > max_latency
+            return not (slow and now - self.last_attempt < self.cooldown)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "requests": self.requests,
+                "failures": self.failures,
+                "retries": self.retries,
+                "consecutive_failures": self.consecutive_failures,
+                "latency_seconds": round(self.latency, 4) if self.latency is not None else None,
+            }
+
+def _retryable(exc: Exception) -> bool:
+    """Timeouts, connection errors, TransientErrors and HTTP errors carrying a retryable status."""
+    import requests
+
+    if isinstance(exc, TransientError):
+        return True
+    if isinstance(exc, (requests.Timeout, requests.ConnectionError)):
+        return True
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status in RETRY_STATUSES
+
+def _retry_after(response) -> Optional[float]:
+    """The delay a 429/503 response asks for, when it gives one in seconds."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class Transport:
+    """
+    Pooled sessions, per-host limits, retries and circuit breakers shared by
+    all tools. Sources are named by the caller ('tavily', 'gdelt'); requests
+    without a name are tracked per host.
+    """
+
+    def __init__(self, pool_size: int, per_host_limit: int, retries: int, backoff_base: float,
+                 backoff_max: float, failure_threshold: int, cooldown: float):
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._session = None
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._health: Dict[str, SourceHealth] = {}
+        self._lock = threading.Lock()
+
+    def session(self):
+        """The shared keep-alive session, created on first use."""
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=32, pool_maxsize=self.pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["User-Agent"] = "Mozilla/5.0 (compatible; synapse-agent/1.0)"
+                self._session = session
+            return self._session
+
+    def _host_limit(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_limits[host]
+
+    def health(self, source: str) -> SourceHealth:
+        with self._lock:
+            if source not in self._health:
+                self._health[source] = SourceHealth(self.failure_threshold, self.cooldown)
+            return self._health[source]
+
+    def available(self, source: str, max_latency: Optional[float] = None) -> bool:
+        """Whether `source` is worth calling now (see SourceHealth.available)."""
+        return self.health(source).available(max_latency)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Health counters for every source seen so far."""
+        with self._lock:
+            health = dict(self._health)
+        return {source: entry.snapshot() for source, entry in sorted(health.items())}
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff, or the server's Retry-After when it is longer."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def call(self, source: str, func, *args, retries: Optional[int] = None, **kwargs):
+        """
+        Calls `func(*args, **kwargs)` (an SDK request) under the source's
+        circuit breaker, retrying retryable errors. Raises SourceUnavailable
+        when the breaker is open, or the last error once retries run out or
+        a failure opens the breaker (including a failed half-open probe).
+        """
+        health = self.health(source)
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            if not health.acquire():
+                telemetry.increment("http_requests_total", source=source, outcome="rejected")
+                raise SourceUnavailable(f"{source} is unavailable after repeated failures; retrying later.")
+            start = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                # Once the breaker is open a retry could only be rejected, hiding this error.
+                tripped = health.record(False, time.monotonic() - start)
+                if attempt >= retries or tripped or not _retryable(e):
+                    telemetry.increment("http_requests_total", source=source, outcome="error")
+                    raise
+                health.retried()
+                telemetry.increment("http_requests_total", source=source, outcome="retry")
+                time.sleep(self._backoff(attempt, _retry_after(getattr(e, "response", None))))
+                continue
+            health.record(True, time.monotonic() - start)
+            telemetry.increment("http_requests_total", source=source, outcome="ok")
+            return result
+
+    @contextmanager
+    def open(self, method: str, url: str, source: Optional[str] = None,
+             retries: Optional[int] = None, **kwargs) -> Iterator:
+        """
+        Sends a request through the shared session and yields the response,
+        holding a per-host slot until the block exits (so streamed bodies are
+        read within the limit) and closing the response afterwards. The slot
+        is given up while backing off between retries, so one failing or
+        rate-limited request does not hold up others to the same host.
+
+        Retryable statuses and errors are retried; any other status is
+        yielded as-is for the caller to check. Retries stop when a failure
+        opens the breaker (including a failed half-open probe), yielding the
+        last response or raising the last error. Raises SourceUnavailable
+        when the breaker is already open.
+        """
+        host = urlsplit(url).netloc
+        source = source or host
+        health = self.health(source)
+        retries = self.retries if retries is None else retries
+        kwargs.setdefault("timeout", config.HTTP_TIMEOUT)
+
+        limit = self._host_limit(host)
+        response = None
+        for attempt in range(retries + 1):
+            if not health.acquire():
+                telemetry.increment("http_requests_total", source=source, outcome="rejected")
+                raise SourceUnavailable(f"{source} is unavailable after repeated failures; retrying later.")
+            limit.acquire()
+            start = time.monotonic()
+            try:
+                response = self.session().request(method, url, **kwargs)
+            except Exception as e:
+                limit.release()
+                tripped = health.record(False, time.monotonic() - start)
+                if attempt >= retries or tripped or not _retryable(e):
+                    telemetry.increment("http_requests_total", source=source, outcome="error")
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                ok = response.status_code not in RETRY_STATUSES
+                tripped = health.record(ok, time.monotonic() - start)
+                if ok or attempt >= retries or tripped:
+                    telemetry.increment("http_requests_total", source=source, outcome="ok" if ok else "error")
+                    break  # the slot stays held while the caller reads the body
+                delay = self._backoff(attempt, _retry_after(response))
+                response.close()
+                limit.release()
+            health.retried()
+            telemetry.increment("http_requests_total", source=source, outcome="retry")
+            time.sleep(delay)
+
+        try:
+            yield response
+        finally:
+            response.close()
+            limit.release()
+
+    def get(self, url: str, source: Optional[str] = None, **kwargs):
+        """A GET with the body read in full; see open()."""
+        with self.open("GET", url, source=source, **kwargs) as response:
+            response.content
+            return response
+
+TRANSPORT = Transport(
+    pool_size=config.HTTP_POOL_SIZE,
+    per_host_limit=config.HTTP_PER_HOST_LIMIT,
+    retries=config.HTTP_RETRIES,
+    backoff_base=config.HTTP_BACKOFF_BASE,
+    backoff_max=config.HTTP_BACKOFF_MAX,
+    failure_threshold=config.HTTP_BREAKER_FAILURES,
+    cooldown=config.HTTP_BREAKER_COOLDOWN,
+)
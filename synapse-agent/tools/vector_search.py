@@ -1,39 +1,163 @@
 # tools/vector_search.py
 """
-Defines the tool for searching the local vector database.
+Defines the tool for searching the local vector database, and the hybrid
+(BM25 + vector) retrieval behind it.
 """
 import datetime
+import time
+from typing import Dict, List, Optional, Sequence, Set
 from pydantic import BaseModel, Field
+from langchain_core.documents import Document
 from langchain_core.tools import StructuredTool
-from config import VECTOR_DB
+import config
+import telemetry
+from lexical_index import tokenize
+from tools.common import document_id
+
+# Rank constant for reciprocal rank fusion; 60 is the usual choice.
+_RRF_K = 60
 
 class VectorQuery(BaseModel):
     """Input model for the vector database search tool."""
     query: str = Field(..., description="The user's original question or a query to search the vector store with.")
+    k: int = Field(8, ge=1, le=50, description="How many documents to return.")
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]]) -> Dict[str, float]:
+    """Fuses several ranked ID lists into one score per ID (higher is better)."""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (_RRF_K + rank + 1)
+    return fused
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
 
-def search_vector_store(query: str) -> str:
+def mmr_rerank(ranked: Sequence[Document], relevance: Sequence[float], k: int,
+               lambda_mult: float = 0.7, duplicate_similarity: float = 0.9) -> List[Document]:
     """
-    Searches the local vector store for relevant documents to answer a question.
-    Filters results to include only documents from the last 30 days.
+    Maximal marginal relevance over term sets: repeatedly picks the document
+    with the best trade-off between relevance and novelty against those
+    already picked. Documents at least `duplicate_similarity` (Jaccard) close
+    to a picked one are dropped as near-duplicate snippets.
     """
-    # Calculate the Unix timestamp for 30 days ago for numerical filtering.
-    thirty_days_ago_ts = int((datetime.datetime.now() - datetime.timedelta(days=30)).timestamp())
+    if not ranked:
+        return []
+    top = max(relevance) or 1.0
+    candidates = [(doc, score / top, set(tokenize(doc.page_content))) for doc, score in zip(ranked, relevance)]
+    picked: List[tuple] = []
+    while candidates and len(picked) < k:
+        best, best_value = None, None
+        for i, (doc, score, terms) in enumerate(candidates):
+            redundancy = max((_jaccard(terms, other) for _, _, other in picked), default=0.0)
+            value = lambda_mult * score - (1 - lambda_mult) * redundancy
+            if redundancy < duplicate_similarity and (best_value is None or value > best_value):
+                best, best_value = i, value
+        if best is None:
+            break
+        picked.append(candidates.pop(best))
+    return [doc for doc, _, _ in picked]
 
-    # Use the 'timestamp' field with the $gt operator for a valid numerical comparison.
-    docs = VECTOR_DB.similarity_search(
-        query, k=8, filter={"timestamp": {"$gt": thirty_days_ago_ts}}
-    )
+def _doc_key(doc: Document) -> str:
+    """The stored ID of a document returned by a similarity search."""
+    return getattr(doc, "id", None) or document_id(doc.metadata.get("url", ""), doc.page_content)
+
+def _lexical_index():
+    """The shared BM25 index, first picking up documents other processes have stored."""
+    index = config.LEXICAL_INDEX
+    if time.time() - index.synced_at > config.RETRIEVAL_LEXICAL_SYNC_INTERVAL:
+        index.sync(config.VECTOR_DB)
+    return index
+
+def _lexical_confident(index, query: str, hits, k: int) -> bool:
+    """True when at least `k` hits contain every query term and one of the terms is distinctive."""
+    terms = set(tokenize(query))
+    if not terms:
+        return False
+    full_matches = sum(1 for hit in hits if hit.matched == len(terms))
+    return full_matches >= k and max(index.idf(term) for term in terms) >= config.RETRIEVAL_LEXICAL_MIN_IDF
+
+@telemetry.traced("vector", "retrieve_documents")
+def retrieve_documents(query: str, k: int = 8, max_age_days: int = 30,
+                       mode: Optional[str] = None) -> List[Document]:
+    """
+    Returns up to `k` documents relevant to `query` that were published
+    within the last `max_age_days` days.
+
+    In "hybrid" mode (the default, see RETRIEVAL_MODE), BM25 runs first; if
+    it is confident the query is answered from the lexical index alone and
+    nothing is embedded, otherwise BM25 and vector rankings are fused. The
+    candidates are reranked with MMR to drop near-duplicate snippets; this
+    is the only de-duplication retrieved documents get, in every mode.
+    """
+    mode = mode or config.RETRIEVAL_MODE
+    # Calculate the Unix timestamp for the cutoff for numerical filtering.
+    cutoff_ts = int((datetime.datetime.now() - datetime.timedelta(days=max_age_days)).timestamp())
 
+    n_candidates = k * config.RETRIEVAL_CANDIDATE_FACTOR
+    if mode == "vector":
+        # Only the weekly partitions overlapping the window are searched. The
+        # vector order is kept (lambda 1), but near-duplicates are still dropped.
+        docs = config.VECTOR_DB.similarity_search(query, k=n_candidates, since_ts=cutoff_ts)
+        return mmr_rerank(docs, [len(docs) - i for i in range(len(docs))], k, 1.0,
+                          config.RETRIEVAL_DUPLICATE_SIMILARITY)
+
+    index = _lexical_index()
+    lexical = index.search(query, k=n_candidates, since_ts=cutoff_ts)
+    docs_by_id: Dict[str, Document] = {}
+    if mode == "lexical" or _lexical_confident(index, query, lexical, k):
+        fused = {hit.doc_id: hit.score for hit in lexical}
+    else:
+        vector_hits = config.VECTOR_DB.similarity_search_with_score(query, k=n_candidates, since_ts=cutoff_ts)
+        docs_by_id = {_doc_key(doc): doc for doc, _ in vector_hits}
+        fused = reciprocal_rank_fusion([[hit.doc_id for hit in lexical], list(docs_by_id)])
+
+    ranked_ids = sorted(fused, key=fused.get, reverse=True)
+    missing = [doc_id for doc_id in ranked_ids if doc_id not in docs_by_id]
+    if missing:
+        docs_by_id.update(config.VECTOR_DB.get_documents(missing))
+    # IDs whose partition was dropped since they were indexed simply fall out here.
+    ranked_ids = [doc_id for doc_id in ranked_ids if doc_id in docs_by_id]
+    return mmr_rerank([docs_by_id[doc_id] for doc_id in ranked_ids], [fused[doc_id] for doc_id in ranked_ids],
+                      k, config.RETRIEVAL_MMR_LAMBDA, config.RETRIEVAL_DUPLICATE_SIMILARITY)
+
+def local_coverage(query: str, min_similarity: float, k: int = 10, max_age_days: int = 30) -> Dict:
+    """
+    Describes how well the local store already covers `query`: how many
+    documents reach `min_similarity`, when the newest of them was ingested
+    and which sources they came from.
+    """
+    cutoff_ts = int((datetime.datetime.now() - datetime.timedelta(days=max_age_days)).timestamp())
+    hits = config.VECTOR_DB.similarity_search_with_score(query, k=k, since_ts=cutoff_ts)
+
+    # Chroma's default space is squared L2; on unit-normalized embeddings
+    # (all-MiniLM-L6-v2 normalizes) that is 2 - 2 * cosine similarity.
+    relevant = [doc for doc, distance in hits if 1 - distance / 2 >= min_similarity]
+    return {
+        "relevant_docs": len(relevant),
+        # Documents stored before 'ingested_at' existed fall back to their publish time.
+        "newest": max((d.metadata.get("ingested_at", d.metadata.get("timestamp", 0)) for d in relevant), default=None),
+        "sources": sorted({d.metadata.get("source", "N/A") for d in relevant}),
+    }
+
+def format_documents(docs: List[Document]) -> str:
+    """Formats retrieved documents as context text for an agent or prompt."""
     if not docs:
         return "No relevant documents were found in the local vector store. Use other tools to load information first."
 
-    # Format the retrieved documents for the agent.
     return "\n\n".join(
         f"Source: {d.metadata.get('source', 'N/A')} ({d.metadata.get('date', 'N/A')})\n"
         f"Content: {d.page_content}\nURL: {d.metadata.get('url', 'N/A')}"
         for d in docs
     )
 
+def search_vector_store(query: str, k: int = 8) -> str:
+    """
+    Searches the local vector store for relevant documents to answer a question.
+    Filters results to include only documents from the last 30 days.
+    """
+    return format_documents(retrieve_documents(query, k=k))
+
 VECTOR_SEARCH_TOOL = StructuredTool.from_function(
     func=search_vector_store,
     name="vector_database_search",
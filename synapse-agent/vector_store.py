@@ -0,0 +1,202 @@
+# vector_store.py
+"""
+A time-partitioned vector store built from weekly Chroma collections.
+"""
+import datetime
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+import telemetry
+
+PARTITION_DAYS = 7
+
+class PartitionedVectorStore:
+    """
+    Stores each document in the weekly collection that covers its timestamp.
+
+    Queries only touch the partitions that overlap the requested window and
+    merge their hits by distance, and retention drops whole expired
+    collections instead of deleting documents one by one. A pre-partitioning
+    collection (`legacy_collection`), if present, is still searched so older
+    data stays reachable until it ages out of every query window.
+    """
+
+    def __init__(self, persist_directory: str, embedding: Embeddings, prefix: str = "news",
+                 retention_days: int = 45, legacy_collection: Optional[str] = None):
+        import chromadb
+
+        self.client = chromadb.PersistentClient(path=persist_directory)
+        self.embedding = embedding
+        self.prefix = prefix
+        self.retention_days = retention_days
+        self.legacy_collection = legacy_collection
+        self._partitions: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    # --- Partition naming ---
+
+    def partition_start(self, timestamp: int) -> datetime.datetime:
+        """The UTC Monday 00:00 that starts the partition containing `timestamp`."""
+        dt = datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc)
+        monday = dt.date() - datetime.timedelta(days=dt.weekday())
+        return datetime.datetime.combine(monday, datetime.time.min, tzinfo=datetime.timezone.utc)
+
+    def partition_name(self, timestamp: int) -> str:
+        return f"{self.prefix}_{self.partition_start(timestamp):%Y%m%d}"
+
+    def _partition_bounds(self, name: str) -> Tuple[int, int]:
+        """Returns the [start, end) Unix timestamps covered by a partition name."""
+        start = datetime.datetime.strptime(name[len(self.prefix) + 1:], "%Y%m%d")
+        start = start.replace(tzinfo=datetime.timezone.utc)
+        end = start + datetime.timedelta(days=PARTITION_DAYS)
+        return int(start.timestamp()), int(end.timestamp())
+
+    def _collection_names(self) -> List[str]:
+        # chromadb >= 0.6 returns names; older versions return Collection objects.
+        return [c if isinstance(c, str) else c.name for c in self.client.list_collections()]
+
+    def partition_names(self) -> List[str]:
+        """All time partitions on disk, oldest first."""
+        marker = f"{self.prefix}_"
+        return sorted(
+            name for name in self._collection_names()
+            if name.startswith(marker) and name[len(marker):].isdigit()
+        )
+
+    def _store(self, name: str):
+        """Returns the LangChain Chroma wrapper for a collection, creating it if needed."""
+        with self._lock:
+            store = self._partitions.get(name)
+            if store is None:
+                from langchain_chroma import Chroma
+
+                store = Chroma(client=self.client, collection_name=name, embedding_function=self.embedding)
+                self._partitions[name] = store
+            return store
+
+    # --- Writes ---
+
+    def existing_ids(self, ids: Iterable[str]) -> Set[str]:
+        """Returns which of `ids` are already stored in any live partition."""
+        ids = list(ids)
+        found: Set[str] = set()
+        for name in reversed(self.partition_names()):
+            remaining = [doc_id for doc_id in ids if doc_id not in found]
+            if not remaining:
+                break
+            found.update(self._store(name).get(ids=remaining, include=[])["ids"])
+        return found
+
+    def add_documents(self, documents: List[Document], ids: List[str]) -> List[str]:
+        """
+        Writes documents into the partition matching their 'timestamp' metadata,
+        with one upsert per partition touched. Documents already past retention
+        are skipped. Returns the IDs actually written.
+        """
+        cutoff = self._retention_cutoff(self.retention_days)
+        grouped: Dict[str, Tuple[List[Document], List[str]]] = {}
+        for doc, doc_id in zip(documents, ids):
+            name = self.partition_name(doc.metadata["timestamp"])
+            if self._partition_bounds(name)[1] <= cutoff:
+                continue  # It would be dropped by retention anyway.
+            docs, doc_ids = grouped.setdefault(name, ([], []))
+            docs.append(doc)
+            doc_ids.append(doc_id)
+
+        new_partition = bool(set(grouped) - set(self.partition_names()))
+        written = []
+        for name, (docs, doc_ids) in grouped.items():
+            self._store(name).add_documents(docs, ids=doc_ids)
+            written.extend(doc_ids)
+
+        # Starting a new week is a natural, cheap point to age out old ones.
+        if new_partition:
+            self.drop_expired()
+        return written
+
+    def _retention_cutoff(self, retention_days: int) -> int:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return int((now - datetime.timedelta(days=retention_days)).timestamp())
+
+    def drop_expired(self, retention_days: Optional[int] = None) -> List[str]:
+        """Deletes every partition that ended more than `retention_days` ago."""
+        retention_days = self.retention_days if retention_days is None else retention_days
+        cutoff = self._retention_cutoff(retention_days)
+        dropped = []
+        for name in self.partition_names():
+            if self._partition_bounds(name)[1] <= cutoff:
+                self.client.delete_collection(name)
+                with self._lock:
+                    self._partitions.pop(name, None)
+                dropped.append(name)
+        return dropped
+
+    # --- Reads ---
+
+    def _live_collections(self) -> List[str]:
+        """Every live partition, newest first, then the legacy collection if it exists."""
+        names = list(reversed(self.partition_names()))
+        if self.legacy_collection and self.legacy_collection in self._collection_names():
+            names.append(self.legacy_collection)
+        return names
+
+    def get_documents(self, ids: Iterable[str]) -> Dict[str, Document]:
+        """Fetches stored documents by ID (without vectors) from whichever collections hold them."""
+        remaining = list(dict.fromkeys(ids))
+        found: Dict[str, Document] = {}
+        with telemetry.span("vector", "get_documents") as span:
+            for name in self._live_collections():
+                if not remaining:
+                    break
+                result = self._store(name).get(ids=remaining, include=["documents", "metadatas"])
+                for doc_id, text, metadata in zip(result["ids"], result["documents"], result["metadatas"]):
+                    found[doc_id] = Document(page_content=text, metadata=metadata or {}, id=doc_id)
+                remaining = [doc_id for doc_id in remaining if doc_id not in found]
+            span.set(documents=len(found))
+        return found
+
+    def iter_documents(self, batch_size: int = 5000, where: Optional[Dict] = None) -> Iterator[Tuple[str, str, Dict]]:
+        """Yields (id, text, metadata) for every stored document matching `where`, one page at a time."""
+        for name in self._live_collections():
+            store = self._store(name)
+            offset = 0
+            while True:
+                page = store.get(where=where, include=["documents", "metadatas"], limit=batch_size, offset=offset)
+                if not page["ids"]:
+                    break
+                yield from zip(page["ids"], page["documents"], page["metadatas"])
+                offset += len(page["ids"])
+
+    def similarity_search_with_score(self, query: str, k: int = 8,
+                                     since_ts: Optional[int] = None) -> List[Tuple[Document, float]]:
+        """
+        Returns up to `k` (document, distance) pairs newer than `since_ts`,
+        lowest distance first. The query is embedded once and reused for
+        every partition that overlaps the window.
+        """
+        targets = []
+        for name in self.partition_names():
+            start, end = self._partition_bounds(name)
+            if since_ts is None or end > since_ts:
+                # Partitions entirely inside the window need no metadata filter.
+                needs_filter = since_ts is not None and start <= since_ts
+                targets.append((name, needs_filter))
+        if self.legacy_collection and self.legacy_collection in self._collection_names():
+            targets.append((self.legacy_collection, since_ts is not None))
+        if not targets:
+            return []
+
+        vector = self.embedding.embed_query(query)
+        with telemetry.span("vector", "similarity_search", partitions=len(targets), k=k) as span:
+            hits = []
+            for name, needs_filter in targets:
+                hits.extend(self._store(name).similarity_search_by_vector_with_relevance_scores(
+                    vector, k=k, filter={"timestamp": {"$gt": since_ts}} if needs_filter else None
+                ))
+            hits.sort(key=lambda hit: hit[1])
+            span.set(documents=min(k, len(hits)))
+        return hits[:k]
+
+    def similarity_search(self, query: str, k: int = 8, since_ts: Optional[int] = None) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, since_ts=since_ts)]
@@ -0,0 +1,222 @@
+# watcher.py
+"""
+Background ingestion daemon that keeps the vector store warm.
+
+Polls RSS/Atom feeds and GDELT queries on their own schedules, using
+ETag/Last-Modified conditional requests for feeds and a persistent index of
+seen entries so only new items are fetched and embedded. Each source gets
+jittered scheduling and exponential backoff on failure.
+
+    python watcher.py --feed https://example.com/rss --gdelt "semiconductor tariffs"
+"""
+import argparse
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Set
+from dotenv import load_dotenv
+import config
+
+@dataclass
+class WatchJob:
+    """One polled source: an RSS/Atom feed URL or a GDELT query."""
+    kind: str  # "rss" or "gdelt"
+    target: str
+    interval: float
+    next_run: float = 0.0
+    failures: int = 0
+    running: bool = False
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.target}"
+
+class SeenIndex:
+    """SQLite-backed record of seen entries and feed validators (ETag / Last-Modified)."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen (source TEXT NOT NULL, entry_id TEXT NOT NULL, "
+            "seen_at REAL NOT NULL, PRIMARY KEY (source, entry_id))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS validators (source TEXT PRIMARY KEY, etag TEXT, modified TEXT)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def unseen(self, source: str, entry_ids: List[str]) -> Set[str]:
+        """Returns the subset of `entry_ids` not yet recorded for `source`."""
+        with self._lock:
+            seen = set()
+            for i in range(0, len(entry_ids), 500):
+                chunk = entry_ids[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                seen.update(row[0] for row in self._conn.execute(
+                    f"SELECT entry_id FROM seen WHERE source = ? AND entry_id IN ({placeholders})",
+                    [source, *chunk],
+                ))
+        return set(entry_ids) - seen
+
+    def mark_seen(self, source: str, entry_ids: List[str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen (source, entry_id, seen_at) VALUES (?, ?, ?)",
+                [(source, entry_id, now) for entry_id in entry_ids],
+            )
+            self._conn.commit()
+
+    def validators(self, source: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, modified FROM validators WHERE source = ?", (source,)
+            ).fetchone()
+        return row if row else (None, None)
+
+    def set_validators(self, source: str, etag: Optional[str], modified: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO validators (source, etag, modified) VALUES (?, ?, ?)",
+                (source, etag, modified),
+            )
+            self._conn.commit()
+
+    def prune(self, max_age: float) -> None:
+        """Forgets seen entries older than `max_age` seconds."""
+        with self._lock:
+            self._conn.execute("DELETE FROM seen WHERE seen_at < ?", (time.time() - max_age,))
+            self._conn.commit()
+
+def poll_feed(job: WatchJob, index: SeenIndex) -> int:
+    """Polls one feed with a conditional GET and ingests entries not seen before."""
+    import feedparser
+    from tools.articles import store_articles
+    from tools.rss import entry_refs
+    from tools.transport import TRANSPORT
+
+    etag, modified = index.validators(job.key)
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if modified:
+        headers["If-Modified-Since"] = modified
+    response = TRANSPORT.get(job.target, headers=headers)
+    if response.status_code == 304:
+        return 0
+    response.raise_for_status()
+    parsed = feedparser.parse(response.content, response_headers=dict(response.headers))
+    if parsed.bozo and not parsed.entries:
+        raise RuntimeError(f"could not parse feed: {parsed.bozo_exception}")
+
+    by_id = {entry.get("id") or entry.get("link"): entry for entry in parsed.entries}
+    new_ids = index.unseen(job.key, [entry_id for entry_id in by_id if entry_id])
+    stored = 0
+    if new_ids:
+        stored = store_articles(entry_refs([by_id[entry_id] for entry_id in new_ids]))
+        index.mark_seen(job.key, list(new_ids))
+    # Only now that the entries are stored: saved earlier, a failed store would
+    # leave the next poll answered with 304 and the entries never ingested.
+    index.set_validators(job.key, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return stored
+
+def poll_gdelt(job: WatchJob, index: SeenIndex) -> int:
+    """Runs one GDELT query and ingests articles whose URLs were not seen before."""
+    from tools.articles import store_articles
+    from tools.gdelt import fetch_gdelt_articles
+
+    refs = {ref[0]: ref for ref in fetch_gdelt_articles(job.target)}
+    new_urls = index.unseen(job.key, list(refs))
+    if not new_urls:
+        return 0
+    stored = store_articles([refs[url] for url in new_urls])
+    index.mark_seen(job.key, list(new_urls))
+    return stored
+
+_POLLERS = {"rss": poll_feed, "gdelt": poll_gdelt}
+
+def _jittered(seconds: float) -> float:
+    return seconds * random.uniform(1 - config.WATCH_JITTER, 1 + config.WATCH_JITTER)
+
+def run_job(job: WatchJob, index: SeenIndex) -> None:
+    """Polls a job once and schedules its next run, backing off after failures."""
+    try:
+        stored = _POLLERS[job.kind](job, index)
+        job.failures = 0
+        job.next_run = time.time() + _jittered(job.interval)
+        if stored:
+            print(f"[watcher] {job.key}: stored {stored} new documents")
+    except Exception as e:
+        job.failures += 1
+        delay = min(job.interval * 2 ** job.failures, config.WATCH_MAX_BACKOFF)
+        job.next_run = time.time() + _jittered(delay)
+        print(f"[watcher] {job.key}: failed ({e}); retrying in {delay:.0f}s")
+    finally:
+        job.running = False
+
+def watch(jobs: List[WatchJob], index: SeenIndex, once: bool = False,
+          stop: Optional[threading.Event] = None) -> None:
+    """
+    Runs every job on its schedule until `stop` is set (or, with `once`,
+    polls each job a single time). Sources are polled concurrently so a
+    slow feed never delays the others.
+    """
+    stop = stop or threading.Event()
+    # Spread the first polls out so a restart does not hit every source at once.
+    for job in jobs:
+        job.next_run = time.time() + (0 if once else random.uniform(0, config.WATCH_JITTER * job.interval))
+
+    with ThreadPoolExecutor(max_workers=config.WATCH_WORKERS, thread_name_prefix="watcher") as executor:
+        if once:
+            list(executor.map(lambda job: run_job(job, index), jobs))
+            return
+        last_prune = time.time()
+        while not stop.is_set():
+            now = time.time()
+            for job in jobs:
+                if not job.running and job.next_run <= now:
+                    job.running = True
+                    executor.submit(run_job, job, index)
+            if now - last_prune > 86400:
+                index.prune(config.WATCH_SEEN_RETENTION)
+                last_prune = now
+            # Wake at least every few seconds: a running job reschedules itself when it finishes.
+            next_due = min((job.next_run for job in jobs if not job.running), default=now + 5.0)
+            stop.wait(min(max(0.5, next_due - now), 5.0))
+
+def main():
+    parser = argparse.ArgumentParser(description="Background feed and GDELT ingestion daemon.")
+    parser.add_argument("--feed", action="append", default=[], help="RSS/Atom feed URL (repeatable).")
+    parser.add_argument("--gdelt", action="append", default=[], help="GDELT query (repeatable).")
+    parser.add_argument("--once", action="store_true", help="Poll every source once and exit.")
+    args = parser.parse_args()
+
+    load_dotenv()
+    feeds = args.feed or config.WATCH_FEEDS
+    queries = args.gdelt or config.WATCH_GDELT_QUERIES
+    jobs = [WatchJob("rss", url, config.WATCH_FEED_INTERVAL) for url in feeds]
+    jobs += [WatchJob("gdelt", query, config.WATCH_GDELT_INTERVAL) for query in queries]
+    if not jobs:
+        print("Nothing to watch. Pass --feed/--gdelt or set WATCH_FEEDS/WATCH_GDELT_QUERIES.")
+        return
+
+    config.warm_up("EMBED_MODEL", "VECTOR_DB")
+    index = SeenIndex(config.WATCH_STATE_PATH)
+    print(f"Watching {len(feeds)} feeds and {len(queries)} GDELT queries. Press Ctrl+C to stop.")
+    stop = threading.Event()
+    try:
+        watch(jobs, index, once=args.once, stop=stop)
+    except KeyboardInterrupt:
+        stop.set()
+        print("\nStopping watcher...")
+
+if __name__ == "__main__":
+    main()